@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 import sys
@@ -5,11 +6,12 @@ from pathlib import Path
 
 import folium
 import numpy as np
-from branca.element import Element
-from folium.plugins import FeatureGroupSubGroup, Search
+from branca.element import Element, MacroElement
+from folium.plugins import FeatureGroupSubGroup
+from jinja2 import Template
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root
-from viz_common import COUNTRY_HEX, COUNTRY_ICON_COLORS, create_base_map
+from viz_common import COUNTRY_HEX, COUNTRY_ICON_COLORS, add_search, create_base_map, marker_layer, span
 
 # Locations are single-sourced from locations.json (GeoJSON), which is also
 # consumed by points_of_interest.html.
@@ -32,14 +34,16 @@ TYPE_LABELS = {
 }
 
 
-def load_locations():
+def load_geojson():
+    with open(os.path.join(SCRIPT_DIR, 'locations.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_locations(geojson):
     """
-    Load locations from locations.json.
+    Unpack the locations FeatureCollection.
     Returns a list of (name, country, type, (lat, lng)) tuples.
     """
-    with open(os.path.join(SCRIPT_DIR, 'locations.json'), 'r', encoding='utf-8') as f:
-        geojson = json.load(f)
-
     locations = []
     for feature in geojson['features']:
         props = feature['properties']
@@ -72,67 +76,162 @@ def create_popup_html(name, loc_type, coords):
     '''
 
 
-locations = load_locations()
-map_center = calculate_map_center(locations)
-
-# Create the standard base map
-m = create_base_map(location=map_center, zoom_start=8)
-
-# Parent group holds every marker (used by the search box); one toggleable
-# subgroup per country shows up in the layer control.
-all_group = folium.FeatureGroup(name='All locations', control=False).add_to(m)
-country_groups = {}
-for country in COUNTRY_ICON_COLORS:
-    country_groups[country] = FeatureGroupSubGroup(all_group, name=country).add_to(m)
-
-for name, country, loc_type, coords in locations:
-    folium.Marker(
-        location=coords,
-        icon=folium.Icon(
-            color=COUNTRY_ICON_COLORS.get(country, 'gray'),
-            icon=TYPE_ICONS[loc_type],
-            prefix='fa',
-        ),
-        popup=folium.Popup(create_popup_html(name, loc_type, coords), max_width=250),
-        tooltip=name,
-        title=name,  # searchable by the Search plugin
-    ).add_to(country_groups.get(country, all_group))
-
-# Search box over all markers
-Search(
-    layer=all_group,
-    search_label='title',
-    placeholder='Search locations...',
-    collapsed=False,
-    position='topright',
-).add_to(m)
-
-# Add layer control for toggling countries and switching base maps
-folium.LayerControl(collapsed=False).add_to(m)
-
-# Fixed legend: marker color = country, icon = location type
-legend_countries = ''.join(
-    f'<div style="margin: 4px 0;"><span style="display:inline-block; width:12px; height:12px; '
-    f'border-radius:50%; background:{COUNTRY_HEX[country]}; margin-right:8px;"></span>{country}</div>'
-    for country in COUNTRY_ICON_COLORS
-)
-legend_types = ''.join(
-    f'<div style="margin: 4px 0;"><i class="fa fa-{TYPE_ICONS[t]}" '
-    f'style="width:16px; text-align:center; margin-right:6px; color:#555;"></i>{TYPE_LABELS[t]}</div>'
-    for t in TYPE_ICONS
-)
-legend_html = f'''
-<div style="position: fixed; bottom: 20px; left: 20px; z-index: 1000; background: white;
-            padding: 12px 14px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.15);
-            font-family: 'Open Sans', Arial, sans-serif; font-size: 12px; color: #333;">
-    <div style="font-weight: 600; margin-bottom: 6px;">Country</div>
-    {legend_countries}
-    <div style="font-weight: 600; margin: 10px 0 6px;">Type</div>
-    {legend_types}
-</div>
-'''
-m.get_root().html.add_child(Element(legend_html))
-
-# Save the map to an HTML file in the same folder as the script
-output_path = os.path.join(SCRIPT_DIR, 'UAC_UL_locations_map.html')
-m.save(output_path)
+class GeoJsonLocations(MacroElement):
+    """
+    Every location as one GeoJSON layer: the FeatureCollection is embedded
+    once, and each feature's marker icon, tooltip and popup are derived in
+    the browser from its properties, using the same TYPE_ICONS,
+    COUNTRY_ICON_COLORS and TYPE_LABELS as the per-marker path. Markers go
+    to their country's subgroup, or to the parent group for other countries.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function () {
+            var typeIcons = {{ this.type_icons|tojson }};
+            var typeLabels = {{ this.type_labels|tojson }};
+            var countryColors = {{ this.country_colors|tojson }};
+            var groups = {
+                {%- for country, group in this.groups.items() %}
+                {{ country|tojson }}: {{ group.get_name() }},
+                {%- endfor %}
+            };
+
+            function element(tag, text, style) {
+                var node = document.createElement(tag);
+                node.textContent = text;
+                node.style.cssText = style;
+                return node;
+            }
+
+            // Same content and styling as create_popup_html() in map_locations.py
+            function popupContent(feature, latlng) {
+                var type = feature.properties.type || 'landmark';
+                var content = element('div', '', "font-family: 'Open Sans', Arial, sans-serif; width: 220px;");
+                content.appendChild(element('h4', feature.properties.name,
+                    'margin: 0 0 8px 0; color: #333; font-size: 14px; line-height: 1.3;'));
+                content.appendChild(element('p', typeLabels[type], 'margin: 0 0 4px 0; font-size: 12px; color: #666;'));
+                content.appendChild(element('p', '📍 ' + latlng.lat.toFixed(4) + ', ' + latlng.lng.toFixed(4),
+                    'margin: 0; font-size: 12px; color: #666;'));
+                return content;
+            }
+
+            L.geoJSON({{ this.data }}, {
+                pointToLayer: function (feature, latlng) {
+                    var properties = feature.properties;
+                    return L.marker(latlng, {
+                        icon: L.AwesomeMarkers.icon({
+                            icon: typeIcons[properties.type || 'landmark'],
+                            iconColor: 'white',
+                            markerColor: countryColors[properties.country] || 'gray',
+                            prefix: 'fa'
+                        }),
+                        title: properties.name  // searchable by the Search plugin
+                    })
+                        .bindTooltip(properties.name)
+                        .bindPopup(function () { return popupContent(feature, latlng); }, {maxWidth: 250});
+                }
+            }).eachLayer(function (marker) {
+                (groups[marker.feature.properties.country] || {{ this.parent_group.get_name() }}).addLayer(marker);
+            });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, geojson, parent_group, groups):
+        super().__init__()
+        self._name = 'GeoJsonLocations'
+        # Compact JSON, safe to inline in a <script> block
+        self.data = json.dumps(geojson, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        self.parent_group = parent_group
+        self.groups = groups
+        self.type_icons = TYPE_ICONS
+        self.type_labels = TYPE_LABELS
+        self.country_colors = COUNTRY_ICON_COLORS
+
+
+parser = argparse.ArgumentParser(description='Build the UAC/UL locations map.')
+parser.add_argument('--cluster', action='store_true',
+                    help='group nearby markers into clusters (for large location inventories)')
+parser.add_argument('--layer-mode', choices=['geojson', 'markers'], default='geojson',
+                    help="'geojson': the FeatureCollection embedded once, markers built client-side "
+                         "(default); 'markers': one folium.Marker per location")
+parser.add_argument('--basemap', metavar='URL',
+                    help="local tile URL template, e.g. 'tiles/{z}/{x}/{y}.png' (see python -m remoboko tiles)")
+args = parser.parse_args()
+
+with span('load'):
+    geojson = load_geojson()
+    locations = load_locations(geojson)
+
+with span('aggregate'):
+    map_center = calculate_map_center(locations)
+
+with span('build figure'):
+    # Create the standard base map
+    m = create_base_map(location=map_center, zoom_start=8, basemap=args.basemap)
+
+    # Parent group holds every marker (used by the search box, and clustered
+    # with --cluster); one toggleable subgroup per country shows up in the
+    # layer control.
+    all_group = marker_layer('All locations', cluster=args.cluster, control=False).add_to(m)
+    country_groups = {}
+    for country in COUNTRY_ICON_COLORS:
+        country_groups[country] = FeatureGroupSubGroup(all_group, name=country).add_to(m)
+
+    if args.layer_mode == 'geojson':
+        GeoJsonLocations(geojson, all_group, country_groups).add_to(m)
+    else:
+        for name, country, loc_type, coords in locations:
+            folium.Marker(
+                location=coords,
+                icon=folium.Icon(
+                    color=COUNTRY_ICON_COLORS.get(country, 'gray'),
+                    icon=TYPE_ICONS[loc_type],
+                    prefix='fa',
+                ),
+                popup=folium.Popup(create_popup_html(name, loc_type, coords), max_width=250),
+                tooltip=name,
+                title=name,  # searchable by the Search plugin
+            ).add_to(country_groups.get(country, all_group))
+
+    # Search box over all markers
+    add_search(
+        m,
+        all_group,
+        search_label='title',
+        placeholder='Search locations...',
+        collapsed=False,
+        position='topright',
+    )
+
+    # Add layer control for toggling countries and switching base maps
+    folium.LayerControl(collapsed=False).add_to(m)
+
+    # Fixed legend: marker color = country, icon = location type
+    legend_countries = ''.join(
+        f'<div style="margin: 4px 0;"><span style="display:inline-block; width:12px; height:12px; '
+        f'border-radius:50%; background:{COUNTRY_HEX[country]}; margin-right:8px;"></span>{country}</div>'
+        for country in COUNTRY_ICON_COLORS
+    )
+    legend_types = ''.join(
+        f'<div style="margin: 4px 0;"><i class="fa fa-{TYPE_ICONS[t]}" '
+        f'style="width:16px; text-align:center; margin-right:6px; color:#555;"></i>{TYPE_LABELS[t]}</div>'
+        for t in TYPE_ICONS
+    )
+    legend_html = f'''
+    <div style="position: fixed; bottom: 20px; left: 20px; z-index: 1000; background: white;
+                padding: 12px 14px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.15);
+                font-family: 'Open Sans', Arial, sans-serif; font-size: 12px; color: #333;">
+        <div style="font-weight: 600; margin-bottom: 6px;">Country</div>
+        {legend_countries}
+        <div style="font-weight: 600; margin: 10px 0 6px;">Type</div>
+        {legend_types}
+    </div>
+    '''
+    m.get_root().html.add_child(Element(legend_html))
+
+with span('write output'):
+    # Save the map to an HTML file in the same folder as the script
+    output_path = os.path.join(SCRIPT_DIR, 'UAC_UL_locations_map.html')
+    m.save(output_path)
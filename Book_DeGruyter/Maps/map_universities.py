@@ -1,19 +1,20 @@
+import argparse
 import os
 import sys
 from pathlib import Path
 
 import folium
 from branca.element import Element
-from folium.utilities import image_to_url
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root
-from viz_common import create_base_map
+from viz_common import create_base_map, span, thumbnail_data_uri
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Define the coordinates and paths for the university logos.
-# Logos live next to this script and get base64-embedded into the HTML,
-# so the map is self-contained and does not depend on the GitHub branch name.
+# Logos live next to this script; thumbnails of them get base64-embedded into
+# the HTML, so the map is self-contained and does not depend on the GitHub
+# branch name.
 universities = {
     'University of Lomé': {
         'coords': (6.175690527334621, 1.2137727591902188),
@@ -37,67 +38,106 @@ universities = {
     }
 }
 
+# Displayed logo sizes in px: marker icon and popup image
+ICON_SIZE = 50
+POPUP_LOGO_SIZE = 60
+
+# Thumbnails are encoded at twice the largest displayed size, for high-DPI screens
+THUMBNAIL_SIZE = 2 * max(ICON_SIZE, POPUP_LOGO_SIZE)
+
+
+def logo_class(logo):
+    """CSS class whose background is the given logo file."""
+    return f'logo-{os.path.splitext(logo)[0]}'
+
+
 def create_popup_html(name, logo, country):
     """
     Create rich popup HTML with logo and info.
     """
     return f'''
     <div style="font-family: Arial, sans-serif; text-align: center; width: 180px; padding: 10px;">
-        <img src="{logo}" style="width: 60px; height: 60px; border-radius: 8px; margin-bottom: 8px; object-fit: cover; box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
+        <div class="university-logo {logo_class(logo)}" role="img" aria-label="{name} logo"
+             style="display: inline-block; width: {POPUP_LOGO_SIZE}px; height: {POPUP_LOGO_SIZE}px;
+                    border-radius: 8px; margin-bottom: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.2);"></div>
         <h4 style="margin: 0 0 4px 0; color: #333; font-size: 13px; line-height: 1.3;">{name}</h4>
         <p style="margin: 0; font-size: 11px; color: #666;">📍 {country}</p>
     </div>
     '''
 
-# Calculate the average coordinates to center the map on all universities
-avg_lat = sum(uni['coords'][0] for uni in universities.values()) / len(universities)
-avg_lng = sum(uni['coords'][1] for uni in universities.values()) / len(universities)
-map_center = [avg_lat, avg_lng]
-
-# Create the standard base map
-m = create_base_map(location=map_center, zoom_start=7)
-
-# Add CSS for custom tooltip styling
-tooltip_css = '''
-<style>
-.custom-tooltip {
-    background-color: white !important;
-    border: 1px solid #ccc !important;
-    border-radius: 4px !important;
-    padding: 6px 10px !important;
-    font-family: Arial, sans-serif !important;
-    font-size: 12px !important;
-    font-weight: 500 !important;
-    color: #333 !important;
-    box-shadow: 0 2px 6px rgba(0,0,0,0.15) !important;
-}
-</style>
-'''
-m.get_root().html.add_child(Element(tooltip_css))
-
-# Create a feature group for universities
-universities_group = folium.FeatureGroup(name='Universities')
-
-# Add custom icon markers for the universities
-for uni, details in universities.items():
-    # Embed the logo as a data URI, used for both the marker icon and the popup image
-    logo_data_uri = image_to_url(os.path.join(SCRIPT_DIR, details['logo']))
-    icon = folium.CustomIcon(logo_data_uri, icon_size=(50, 50))
-    popup_html = create_popup_html(uni, logo_data_uri, details['country'])
-
-    folium.Marker(
-        location=details['coords'],
-        icon=icon,
-        popup=folium.Popup(popup_html, max_width=220),
-        tooltip=folium.Tooltip(uni, permanent=False, className='custom-tooltip')
-    ).add_to(universities_group)
-
-universities_group.add_to(m)
-
-# Add layer control for toggling layers and switching base maps
-folium.LayerControl(collapsed=False).add_to(m)
-
-# Save the map to an HTML file in the same folder as the script
-script_dir = os.path.dirname(os.path.abspath(__file__))
-output_path = os.path.join(script_dir, 'universities_map.html')
-m.save(output_path)
+parser = argparse.ArgumentParser(description='Build the universities map.')
+parser.add_argument('--basemap', metavar='URL',
+                    help="local tile URL template, e.g. 'tiles/{z}/{x}/{y}.png' (see python -m remoboko tiles)")
+args = parser.parse_args()
+
+with span('aggregate'):
+    # Calculate the average coordinates to center the map on all universities
+    avg_lat = sum(uni['coords'][0] for uni in universities.values()) / len(universities)
+    avg_lng = sum(uni['coords'][1] for uni in universities.values()) / len(universities)
+    map_center = [avg_lat, avg_lng]
+
+with span('build figure'):
+    # Create the standard base map
+    m = create_base_map(location=map_center, zoom_start=7, basemap=args.basemap)
+
+    # Add CSS for custom tooltip styling
+    tooltip_css = '''
+    <style>
+    .custom-tooltip {
+        background-color: white !important;
+        border: 1px solid #ccc !important;
+        border-radius: 4px !important;
+        padding: 6px 10px !important;
+        font-family: Arial, sans-serif !important;
+        font-size: 12px !important;
+        font-weight: 500 !important;
+        color: #333 !important;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.15) !important;
+    }
+    </style>
+    '''
+    m.get_root().html.add_child(Element(tooltip_css))
+
+    # Each logo is embedded once, as the background of a CSS class shared by
+    # its marker icon and its popup
+    logo_css = ''
+    for logo in sorted({details['logo'] for details in universities.values()}):
+        logo_uri = thumbnail_data_uri(os.path.join(SCRIPT_DIR, logo), THUMBNAIL_SIZE)
+        logo_css += f'.{logo_class(logo)} {{ background-image: url({logo_uri}); }}\n'
+    m.get_root().header.add_child(Element(f'''
+    <style>
+    .university-logo {{ background-size: cover; background-position: center; }}
+    {logo_css}</style>
+    '''))
+
+    # Create a feature group for universities
+    universities_group = folium.FeatureGroup(name='Universities')
+
+    # Add custom icon markers for the universities
+    for uni, details in universities.items():
+        # The marker icon shows the logo through its CSS class
+        icon = folium.DivIcon(
+            html=f'<div class="university-logo {logo_class(details["logo"])}" '
+                 f'style="width: {ICON_SIZE}px; height: {ICON_SIZE}px;"></div>',
+            icon_size=(ICON_SIZE, ICON_SIZE),
+            icon_anchor=(ICON_SIZE // 2, ICON_SIZE // 2),
+        )
+        popup_html = create_popup_html(uni, details['logo'], details['country'])
+
+        folium.Marker(
+            location=details['coords'],
+            icon=icon,
+            popup=folium.Popup(popup_html, max_width=220),
+            tooltip=folium.Tooltip(uni, permanent=False, className='custom-tooltip')
+        ).add_to(universities_group)
+
+    universities_group.add_to(m)
+
+    # Add layer control for toggling layers and switching base maps
+    folium.LayerControl(collapsed=False).add_to(m)
+
+with span('write output'):
+    # Save the map to an HTML file in the same folder as the script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(script_dir, 'universities_map.html')
+    m.save(output_path)
@@ -1,22 +1,28 @@
-// Interactive D3 timeline for the Book_DeGruyter events (data.json).
-// Benin events are drawn above the axis, Togo events below, with labels
-// staggered in lanes to reduce overlaps.
+// Interactive D3 timeline for the Book_DeGruyter events. Benin events are
+// drawn above the axis, Togo events below. Label lanes, positions and line
+// breaks are computed at build time by timeline_layout.py and read from
+// data.layout.json, so the page does no layout work of its own.
 
 const COUNTRY_COLORS = {
     'Benin': '#3388ff',
     'Togo': '#2ecc71'
 };
 
+// Label text metrics, matching WEB_FONT_PX and LINE_HEIGHT_EM in timeline_layout.py
+const FONT_PX = 11;
+const LINE_HEIGHT_PX = 1.2 * FONT_PX;
+
 document.addEventListener('DOMContentLoaded', function() {
-    d3.json('data.json')
-        .then(data => createTimeline(data))
+    d3.json('data.layout.json')
+        .then(layout => createTimeline(layout))
         .catch(error => console.error('Error loading the JSON file:', error));
 });
 
-function createTimeline(data) {
-    const margin = {top: 60, right: 40, bottom: 60, left: 40};
-    const width = 1200 - margin.left - margin.right;
-    const height = 700 - margin.top - margin.bottom;
+function createTimeline(layout) {
+    const data = layout.events;
+    const margin = {top: 60, right: 50, bottom: 40, left: 50};
+    const width = layout.web.width;
+    const height = layout.web.height;
 
     // Responsive SVG: viewBox scales with the container width
     const svg = d3.select("#timeline")
@@ -28,11 +34,9 @@ function createTimeline(data) {
 
     const parseDate = d3.timeParse("%Y-%m-%d");
     data.forEach(d => d.date = parseDate(d.date));
-    data.sort((a, b) => a.date - b.date);
 
     const x = d3.scaleTime()
-        .domain(d3.extent(data, d => d.date))
-        .nice()
+        .domain(layout.web.domain.map(parseDate))
         .range([0, width]);
 
     const axisY = height / 2;
@@ -49,40 +53,16 @@ function createTimeline(data) {
 
     const formatDate = d3.timeFormat("%-d %B %Y");
 
-    // Stagger labels in lanes to reduce overlaps: each new label goes to the
-    // first lane on its side whose previous label is far enough to the left.
-    const laneStep = 62;
-    const laneBase = 40;
-    const laneCount = 4;
-    const minLabelGap = 135;  // px between label centers sharing a lane
-    const laneLastX = {
-        'Benin': new Array(laneCount).fill(-Infinity),
-        'Togo': new Array(laneCount).fill(-Infinity)
-    };
-
-    function assignLane(country, xPos) {
-        const lanes = laneLastX[country];
-        let lane = lanes.findIndex(lastX => xPos - lastX >= minLabelGap);
-        if (lane === -1) {
-            // All lanes crowded: use the one with the most room
-            lane = lanes.indexOf(Math.min(...lanes));
-        }
-        lanes[lane] = xPos;
-        return lane;
-    }
-
     const eventGroups = svg.selectAll(".event")
         .data(data)
         .enter()
         .append("g")
         .attr("class", "event")
-        .attr("transform", d => `translate(${x(d.date)},${axisY})`);
+        .attr("transform", d => `translate(${d.web.x},${axisY})`);
 
     eventGroups.each(function(d) {
         const g = d3.select(this);
-        const side = d.country === 'Benin' ? -1 : 1;   // Benin above, Togo below
-        const lane = assignLane(d.country, x(d.date));
-        const labelY = side * (laneBase + lane * laneStep);
+        const labelY = d.web.y;   // inner edge of the label's lane; negative above the axis
         const color = COUNTRY_COLORS[d.country] || '#888';
 
         g.append("line")
@@ -96,12 +76,20 @@ function createTimeline(data) {
             .attr("r", 4.5)
             .attr("fill", color);
 
-        const label = g.append("text")
+        // Lines stack away from the axis: downwards below it, upwards above it
+        const firstBaseline = labelY < 0
+            ? labelY - 0.3 * FONT_PX - (d.lines.length - 1) * LINE_HEIGHT_PX
+            : labelY + FONT_PX;
+        g.append("text")
             .attr("class", "event-text")
-            .attr("y", labelY + (side < 0 ? -8 : 14))
             .attr("text-anchor", "middle")
-            .text(d.event)
-            .call(wrap, 100);
+            .selectAll("tspan")
+            .data(d.lines)
+            .enter()
+            .append("tspan")
+            .attr("x", 0)
+            .attr("y", (line, i) => firstBaseline + i * LINE_HEIGHT_PX)
+            .text(line => line);
 
         // Hover interactions
         g.on("mouseenter", function(event) {
@@ -136,27 +124,3 @@ function createTimeline(data) {
             .text(country);
     });
 }
-
-function wrap(text, width) {
-    text.each(function() {
-        let text = d3.select(this),
-            words = text.text().split(/\s+/).reverse(),
-            word,
-            line = [],
-            lineNumber = 0,
-            lineHeight = 1.1,
-            y = text.attr("y"),
-            dy = parseFloat(text.attr("dy") || 0),
-            tspan = text.text(null).append("tspan").attr("x", 0).attr("y", y).attr("dy", dy + "em");
-        while (word = words.pop()) {
-            line.push(word);
-            tspan.text(line.join(" "));
-            if (tspan.node().getComputedTextLength() > width) {
-                line.pop();
-                tspan.text(line.join(" "));
-                line = [word];
-                tspan = text.append("tspan").attr("x", 0).attr("y", y).attr("dy", ++lineNumber * lineHeight + dy + "em").text(word);
-            }
-        }
-    });
-}
@@ -1,12 +1,32 @@
-import json
+import argparse
+import glob
 import os
-import textwrap
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from matplotlib import font_manager
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import LineCollection
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root
+from timeline_layout import PRINT_AXES, PRINT_FIRST_LANE, PRINT_FONT_PT, PRINT_SIZE, load_layout
+
+from viz_common import recorded_spans, replay_spans, span
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
+# Decade pages written with --pages: one PDF per timeline and one SVG per page
+pages_dir = os.path.join(current_dir, 'pages')
+# Output suffixes of a timeline laid out on several pages, and of its pages
+# with --pages (page numbers from 1)
+PAGE_SUFFIX = '_{page}'
+
+# Resolution of the PNG; figures are drawn at it, so their tight bounding box
+# is measured as the PNG will be rendered
+PRINT_DPI = 300
 
 
 def setup_fonts():
@@ -22,68 +42,55 @@ def setup_fonts():
             name = font_manager.FontProperties(fname=path).get_name()
             if name not in families:
                 families.append(name)
-    plt.rcParams['font.family'] = families + ['DejaVu Sans']
+    plt.rcParams['font.family'] = [*families, 'DejaVu Sans']
 
 
-def get_label(item):
-    """
-    Resolve the display label for an event. data.json may provide:
-    - "label": explicit label text (with manual line breaks), or
-    - "wrap": false to keep the event title on a single line.
-    Otherwise the title is wrapped automatically.
-    """
-    if 'label' in item and item['label']:
-        return item['label']
-    if item.get('wrap') is False:
-        return item['event']
-    return '\n'.join(textwrap.wrap(item['event'], width=18))
+def start_worker():
+    """Pool initializer: render without windows, in the book fonts."""
+    plt.switch_backend('agg')
+    setup_fonts()
 
 
-def create_timeline(data, categories, filename_base):
-    filtered_data = [item for item in data if item['category'] in categories]
-    df = pd.DataFrame(filtered_data)
-    df['label'] = [get_label(item) for item in filtered_data]
-    if 'x' not in df.columns:
-        df['x'] = None
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date', ascending=True)
+def draw_timeline(events, years, placements, font_size=PRINT_FONT_PT):
+    """
+    A figure of events on a time axis running down from years[0] to
+    years[1], each label at its (lane, x) placement from data.layout.json,
+    in font_size points.
+    """
+    dates = pd.to_datetime([event['date'] for event in events])
+    x = np.array([placement['x'] for placement in placements])
+    benin = np.array([event['country'] == 'Benin' for event in events], dtype=bool)
 
-    width_inches = 8.0
-    height_inches = 8
-    fig, ax = plt.subplots(figsize=(width_inches, height_inches))
+    width_inches, height_inches = PRINT_SIZE
+    fig, ax = plt.subplots(figsize=(width_inches, height_inches), dpi=PRINT_DPI)
 
-    plt.subplots_adjust(left=0.22, bottom=0.05, right=0.78, top=0.95, wspace=0.2, hspace=0.2)
+    fig.subplots_adjust(**PRINT_AXES, wspace=0.2, hspace=0.2)
 
-    min_date = min(df['date'])
-    max_date = max(df['date'])
-    start_year = (min_date.year // 5) * 5
-    end_year = ((max_date.year + 4) // 5) * 5
+    start_year, end_year = years
 
     ax.set_ylim([pd.Timestamp(f"{end_year}-01-01"), pd.Timestamp(f"{start_year}-01-01")])
+    # x is in axes fractions, as in data.layout.json; outer lanes may lie
+    # beyond the axes, which the tight bounding box takes in
+    ax.set_xlim(0, 1)
     ax.axvline(x=0.5, color='black', linestyle='-', linewidth=0.75)
 
-    years = range(start_year, end_year + 1, 5)
-    for year in years:
+    # Every 5 years, or every year on pages spanning less than 10
+    step = 5 if end_year - start_year >= 10 else 1
+    for year in range(-(-start_year // step) * step, end_year + 1, step):
         y_pos = pd.Timestamp(f"{year}-01-01")
         ax.text(0.5, y_pos, str(year), ha='center', va='center', fontsize=11, backgroundcolor='white')
 
-    for _, row in df.iterrows():
-        if row['country'] == 'Benin':
-            default_x = 0.35
-            align = 'right'
-            line_start = 0.495
-        else:
-            default_x = 0.65
-            align = 'left'
-            line_start = 0.505
-
-        text_x = row['x'] if pd.notna(row['x']) else default_x
-
-        ax.plot([line_start, text_x], [row['date'], row['date']], color='gray', linestyle='-', linewidth=0.5)
+    # All connectors, from just off the axis to their label, as one collection
+    y = ax.convert_yunits(dates)
+    line_start = np.where(benin, 0.495, 0.505)
+    segments = np.stack([np.column_stack([line_start, y]), np.column_stack([x, y])], axis=1)
+    ax.add_collection(LineCollection(segments, colors='gray', linestyles='-', linewidths=0.5, clip_on=False),
+                      autolim=False)
 
-        bbox_props = dict(boxstyle="round,pad=0.3", fc="white", ec="black", alpha=1.0, linewidth=0.5)
-        ax.text(text_x, row['date'], row['label'], verticalalignment='center',
-                horizontalalignment=align, fontsize=11, bbox=bbox_props, zorder=10)
+    bbox_props = dict(boxstyle="round,pad=0.3", fc="white", ec="black", alpha=1.0, linewidth=0.5)
+    for event, text_x, text_y, left in zip(events, x, y, benin, strict=True):
+        ax.text(text_x, text_y, '\n'.join(event['lines']), verticalalignment='center',
+                horizontalalignment='right' if left else 'left', fontsize=font_size, bbox=bbox_props, zorder=10)
 
     ax.spines['left'].set_visible(False)
     ax.spines['right'].set_visible(False)
@@ -92,32 +99,144 @@ def create_timeline(data, categories, filename_base):
     ax.xaxis.set_visible(False)
     ax.yaxis.set_visible(False)
 
-    ax.text(0.15, 1.02, 'Benin', ha='right', va='bottom',
+    # Country headings, aligned with the first lane on each side
+    ax.text(PRINT_FIRST_LANE['Benin'], 1.02, 'Benin', ha='right', va='bottom',
             transform=ax.transAxes, fontsize=14, fontweight='bold')
 
-    togo_x = 1.15 if 'Religion' in categories else 0.85
-    ax.text(togo_x, 1.02, 'Togo', ha='left', va='bottom',
+    ax.text(PRINT_FIRST_LANE['Togo'], 1.02, 'Togo', ha='left', va='bottom',
             transform=ax.transAxes, fontsize=14, fontweight='bold')
+    return fig
 
-    plt.savefig(f"{filename_base}.png", dpi=300, bbox_inches='tight')
-    plt.savefig(f"{filename_base}.svg", format='svg', bbox_inches='tight')
 
-    def on_key(event):
-        if event.key == 's':
-            plt.savefig(f"{filename_base}.png", dpi=300, bbox_inches='tight')
-            plt.savefig(f"{filename_base}.svg", format='svg', bbox_inches='tight')
+def tight_bbox(fig):
+    """
+    The bounding box bbox_inches='tight' would crop fig to, computed once so
+    that saving the same figure in several formats draws it once per format
+    rather than twice.
+    """
+    return fig.get_tightbbox().padded(plt.rcParams['savefig.pad_inches'])
 
-    fig.canvas.mpl_connect('key_press_event', on_key)
-    plt.show()
 
+def remove_pages(directory, name, extensions):
+    """Delete the name_<page>.<ext> files left in directory by an earlier layout."""
+    for extension in extensions:
+        for path in glob.glob(os.path.join(directory, f'{glob.escape(name)}_*.{extension}')):
+            if os.path.basename(path)[len(name) + 1:-len(extension) - 1].isdigit():
+                os.remove(path)
 
-setup_fonts()
 
-with open(os.path.join(current_dir, 'data.json'), 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def create_timeline(name, timeline, events, pages=False, interactive=False):
+    """
+    Write the timeline, on the pages it is laid out on, as name.png and
+    name.svg or, when it does not fit on one even with a smaller font,
+    name_<page>.png and name_<page>.svg.
+    With pages, write its decade pages instead, as pages/name.pdf and
+    pages/name_<page>.svg. Returns the paths written. Interactive shows a
+    single-page timeline, with 's' saving it again.
+    """
+    page_years = timeline['decade_pages'] if pages else timeline['pages']
+    font_size = PRINT_FONT_PT if pages else timeline['font_size']
+
+    def placement(event):
+        return event['print']['decade'] if pages else event['print']
+
+    def draw(page):
+        on_page = [event for event in events if placement(event)['page'] == page]
+        with span('build figure'):
+            return draw_timeline(on_page, page_years[page], [placement(event) for event in on_page], font_size)
+
+    if pages:
+        os.makedirs(pages_dir, exist_ok=True)
+        remove_pages(pages_dir, name, ('svg',))
+        paths = []
+        pdf_path = os.path.join(pages_dir, f"{name}.pdf")
+        with PdfPages(pdf_path) as pdf:
+            for page in range(len(page_years)):
+                fig = draw(page)
+                with span('write output'):
+                    bbox = tight_bbox(fig)
+                    pdf.savefig(fig, bbox_inches=bbox)
+                    paths.append(os.path.join(pages_dir, f"{name}{PAGE_SUFFIX.format(page=page + 1)}.svg"))
+                    fig.savefig(paths[-1], format='svg', bbox_inches=bbox)
+                plt.close(fig)
+        return [*paths, pdf_path]
+
+    remove_pages(current_dir, name, ('png', 'svg'))
+    if len(page_years) > 1:
+        paths = []
+        for page in range(len(page_years)):
+            fig = draw(page)
+            with span('write output'):
+                bbox = tight_bbox(fig)
+                filename_base = os.path.join(current_dir, f"{name}{PAGE_SUFFIX.format(page=page + 1)}")
+                fig.savefig(f"{filename_base}.png", bbox_inches=bbox)
+                fig.savefig(f"{filename_base}.svg", format='svg', bbox_inches=bbox)
+                paths += [f"{filename_base}.png", f"{filename_base}.svg"]
+            plt.close(fig)
+        return paths
+
+    filename_base = os.path.join(current_dir, name)
+    fig = draw(0)
+
+    def save():
+        bbox = tight_bbox(fig)
+        fig.savefig(f"{filename_base}.png", bbox_inches=bbox)
+        fig.savefig(f"{filename_base}.svg", format='svg', bbox_inches=bbox)
+        return [f"{filename_base}.png", f"{filename_base}.svg"]
+
+    with span('write output'):
+        paths = save()
+
+    if not interactive:
+        plt.close(fig)
+        return paths
 
-create_timeline(data, ['Religion'],
-                os.path.join(current_dir, 'Religion_Timeline'))
+    def on_key(event):
+        if event.key == 's':
+            save()
 
-create_timeline(data, ['Education', 'Politics'],
-                os.path.join(current_dir, 'Education_Politics_Timeline'))
+    fig.canvas.mpl_connect('key_press_event', on_key)
+    plt.show()
+    return paths
+
+
+def render_in_worker(name, timeline, events, pages):
+    """create_timeline() in a pool process; returns its paths and span records, for replay_spans()."""
+    with recorded_spans() as records:
+        paths = create_timeline(name, timeline, events, pages)
+    return paths, records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Draw the Religion and Education/Politics timelines.')
+    parser.add_argument('--batch', action='store_true',
+                        help='render all timelines concurrently without opening a window '
+                             '(implied by a non-interactive backend such as MPLBACKEND=Agg)')
+    parser.add_argument('--pages', action='store_true',
+                        help='split each timeline into decade pages (pages/NAME.pdf, and one SVG per page) '
+                             'instead of as few pages as fit')
+    args = parser.parse_args()
+    batch = args.batch or plt.get_backend().lower() == 'agg'
+
+    with span('load'):
+        # Events with their label lines and lanes, laid out from data.json
+        layout = load_layout()
+
+    jobs = [
+        (name, timeline, [event for event in layout['events'] if event.get('print', {}).get('timeline') == name])
+        for name, timeline in layout['timelines'].items()
+    ]
+    if batch:
+        # One process per timeline; their spans are recorded there and
+        # replayed here, under 'render'
+        results = []
+        with span('render'), ProcessPoolExecutor(max_workers=len(jobs), initializer=start_worker) as pool:
+            for paths, records in pool.map(render_in_worker, *zip(*jobs, strict=True), [args.pages] * len(jobs)):
+                replay_spans(records)
+                results.append(paths)
+    else:
+        setup_fonts()
+        results = [create_timeline(*job, pages=args.pages, interactive=True) for job in jobs]
+
+    for paths in results:
+        print(f"Timeline saved as: {', '.join(os.path.relpath(path, current_dir) for path in paths)}")
@@ -0,0 +1,417 @@
+"""
+Label layout for the Togo/Benin timelines, computed once at build time.
+
+Reads data.json and writes data.layout.json: every event with its label
+lines and, for each renderer, where its label goes. timeline.py (matplotlib,
+time running down the page) and script.js (D3, time running across) only
+draw what is in that file.
+
+Labels are placed in lanes on their country's side of the axis. Each label
+covers an interval of the time axis, estimated from its text; a greedy
+interval-partitioning pass (sorted by start, with a heap of lane ends)
+puts each label in the innermost lane that is free at its start, in
+O(n log n). Each label then sits just beyond the labels of inner lanes that
+overlap it along time.
+
+On the matplotlib pages, lanes stop at the edge of the page. The book
+figure of each timeline is one page, around its hand-placed labels, with the
+label font shrunk as far as PRINT_MIN_FONT_PT to fit. Otherwise (and on the
+decade pages of timeline.py --pages), a time range whose labels need more
+lanes than fit is split in two, each half on its own page with a stretched
+time axis, down to single years; a year that still does not fit continues on
+further pages.
+"""
+
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import sys
+import textwrap
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root
+from viz_common import span
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+data_path = os.path.join(current_dir, 'data.json')
+layout_path = os.path.join(current_dir, 'data.layout.json')
+
+# Bump when the layout or the file format changes, to force a rebuild
+LAYOUT_VERSION = 5
+
+# The matplotlib timelines, as output file name -> categories shown
+TIMELINES = {
+    'Religion_Timeline': ('Religion',),
+    'Education_Politics_Timeline': ('Education', 'Politics'),
+}
+
+# Label text estimates: average glyph width and line height, in ems
+CHAR_WIDTH_EM = 0.55
+LINE_HEIGHT_EM = 1.2
+WRAP_CHARS = 18
+
+# Matplotlib figure geometry (inches, and axes position as figure fractions)
+PRINT_SIZE = (8.0, 8.0)
+PRINT_AXES = dict(left=0.22, bottom=0.05, right=0.78, top=0.95)
+PRINT_FONT_PT = 11
+# Smallest label font, and the step down to it, tried to fit the book figure
+# on one page
+PRINT_MIN_FONT_PT = 8
+PRINT_FONT_STEP_PT = 0.5
+PRINT_BOX_PAD_EM = 0.3  # boxstyle "round,pad=0.3"
+PRINT_GAP_PT = 2  # between labels sharing a lane
+PRINT_LANE_GAP = 0.02  # between lanes, in axes fractions
+# Inner edge of the first lane, in axes fractions, per side (the axis is at 0.5)
+PRINT_FIRST_LANE = {'Benin': 0.44, 'Togo': 0.56}
+# Farthest a label may reach from the axis, in axes fractions: the edge of
+# the page (the axes are centered on it)
+PRINT_MAX_DEPTH = 0.5 + PRINT_AXES['left'] / (PRINT_AXES['right'] - PRINT_AXES['left'])
+# Hand-placed "x" values in data.json were tuned on the original book figure,
+# whose x axis matplotlib autoscaled (with 5% margins) to the label anchors,
+# 0.35 or 0.65 unless placed, and the connector ends next to the axis at 0.5
+HAND_X_DEFAULT = {'Benin': 0.35, 'Togo': 0.65}
+HAND_X_CONNECTOR = {'Benin': 0.495, 'Togo': 0.505}
+HAND_X_MARGIN = 0.05
+# Years per page of the paginated timelines
+PAGE_YEARS = 10
+
+# D3 geometry, in SVG px
+WEB_WIDTH = 1100
+WEB_FONT_PX = 11
+WEB_GAP_PX = 12  # between labels sharing a lane
+WEB_LANE_BASE = 40  # axis to the first lane
+WEB_LANE_GAP = 10  # between lanes
+
+# Side of the axis each country's labels go on: -1 is left (matplotlib) or
+# above (D3), 1 is right or below
+SIDES = {'Benin': -1, 'Togo': 1}
+
+
+def get_label(item):
+    """
+    Resolve the display label lines for an event. data.json may provide:
+    - "label": explicit label text (with manual line breaks), or
+    - "wrap": false to keep the event title on a single line.
+    Otherwise the title is wrapped automatically.
+    """
+    if item.get('label'):
+        return item['label'].split('\n')
+    if item.get('wrap') is False:
+        return [item['event']]
+    return textwrap.wrap(item['event'], width=WRAP_CHARS)
+
+
+def year_range(dates):
+    """First and last axis years: the data's span, rounded out to 5 years."""
+    return min(dates).year // 5 * 5, (max(dates).year + 4) // 5 * 5
+
+
+def hand_x_scale(events):
+    """Axes fractions per unit of hand-placed x, on the original figure of events."""
+    xs = [event.get('x', HAND_X_DEFAULT[event['country']]) for event in events]
+    xs += [HAND_X_CONNECTOR[event['country']] for event in events]
+    return 1 / ((max(xs) - min(xs)) * (1 + 2 * HAND_X_MARGIN))
+
+
+def pack_lanes(intervals, max_lanes=None):
+    """
+    Lane index for each (start, end) interval such that intervals sharing a
+    lane don't overlap, using as few lanes as possible and, for each
+    interval, the lowest lane free at its start. O(n log n). Returns None as
+    soon as more than max_lanes lanes would be needed.
+    """
+    lanes = [0] * len(intervals)
+    busy = []  # (end, lane) of the last interval in each occupied lane
+    free = []  # lanes whose last interval has ended
+    lane_count = 0
+    for i in sorted(range(len(intervals)), key=lambda i: intervals[i]):
+        start, end = intervals[i]
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane, lane_count = lane_count, lane_count + 1
+            if max_lanes is not None and lane_count > max_lanes:
+                return None
+        lanes[i] = lane
+        heapq.heappush(busy, (end, lane))
+    return lanes
+
+
+def stack_lanes(intervals, lanes, depths, first, gap, fixed=()):
+    """
+    Inner edge of each item: `first` in lane 0 and, in each further lane,
+    just beyond (by `gap`) the items of inner lanes that overlap it along
+    time. A lane's items are disjoint, so those overlapping an interval are
+    found by binary search: O(n log n) per inner lane. Items are then moved
+    out past any fixed ((start, end), edge, depth) item they would overlap.
+    """
+    fixed = sorted(fixed, key=lambda item: item[1])
+    by_lane = [[] for _ in range(max(lanes, default=-1) + 1)]
+    for i in sorted(range(len(lanes)), key=lambda i: intervals[i]):
+        by_lane[lanes[i]].append(i)
+    starts = [[intervals[i][0] for i in items] for items in by_lane]
+    edges = [first] * len(lanes)
+    for lane in range(len(by_lane)):
+        for i in by_lane[lane]:
+            start, end = intervals[i]
+            for inner in range(lane):
+                # The last inner item starting at or before `start`, then every
+                # later one starting before `end`
+                j = max(bisect.bisect_right(starts[inner], start) - 1, 0)
+                while j < len(by_lane[inner]) and starts[inner][j] < end:
+                    other = by_lane[inner][j]
+                    if intervals[other][1] > start:
+                        edges[i] = max(edges[i], edges[other] + depths[other] + gap)
+                    j += 1
+            for (fixed_start, fixed_end), edge, depth in fixed:
+                if (fixed_start < end and start < fixed_end
+                        and edges[i] < edge + depth + gap and edge < edges[i] + depths[i] + gap):
+                    edges[i] = edge + depth + gap
+    return edges
+
+
+def layout_side(positions, extents, depths, first, gap, limit=None, fixed=()):
+    """
+    Pack one side's labels ((position, extent) along time) into lanes, around
+    the fixed labels ((position, extent), inner edge, depth); returns (lanes,
+    inner edges), or None if a label would reach beyond limit.
+    """
+    max_lanes = None
+    if limit is not None and depths:
+        # No lane is shallower than the shallowest label
+        max_lanes = max(1, int((limit - first + gap) / (min(depths) + gap)))
+    intervals = [(p - e / 2, p + e / 2) for p, e in zip(positions, extents)]
+    lanes = pack_lanes(intervals, max_lanes)
+    if lanes is None:
+        return None
+    fixed = [((p - e / 2, p + e / 2), edge, depth) for (p, e), edge, depth in fixed]
+    edges = stack_lanes(intervals, lanes, depths, first, gap, fixed)
+    if limit is not None and any(
+        edge + depth > limit for edge, depth in [*zip(edges, depths), *(item[1:] for item in fixed)]
+    ):
+        return None
+    return lanes, edges
+
+
+def print_label_width(lines, font_pt=PRINT_FONT_PT):
+    """Estimated width of a matplotlib label, box included, in axes fractions."""
+    axes_width_pt = PRINT_SIZE[0] * 72 * (PRINT_AXES['right'] - PRINT_AXES['left'])
+    return (max(map(len, lines)) * CHAR_WIDTH_EM + 2 * PRINT_BOX_PAD_EM) * font_pt / axes_width_pt
+
+
+def layout_print(events, start_year, end_year, fit=True, overrides=False, font_pt=PRINT_FONT_PT):
+    """
+    Lane and label x (in axes fractions) of each event, for a matplotlib page
+    whose time axis runs from start_year to end_year, or None if fit and the
+    labels do not fit on the page (see PRINT_MAX_DEPTH). Labels extend along
+    time by their height and away from the axis by their width; both are
+    estimated in points at font_pt, then converted to days and axes fractions. With
+    overrides, events with an "x" in data.json (hand-placed for the book
+    figure, see hand_x_scale) keep their distance from the axis, with a lane
+    of None, and the others are laid out around them.
+    """
+    axes_height_pt = PRINT_SIZE[1] * 72 * (PRINT_AXES['top'] - PRINT_AXES['bottom'])
+    days_per_pt = (date(end_year, 1, 1) - date(start_year, 1, 1)).days / axes_height_pt
+    placements = [None] * len(events)
+    scale = hand_x_scale(events) if overrides else None
+    for country, side in SIDES.items():
+        def extent(event):
+            return (event['day'].toordinal(), (
+                ((len(event['lines']) - 1) * LINE_HEIGHT_EM + 1 + 2 * PRINT_BOX_PAD_EM) * font_pt + PRINT_GAP_PT
+            ) * days_per_pt)
+
+        side_events = [i for i, event in enumerate(events) if event['country'] == country]
+        placed = [i for i in side_events if overrides and 'x' in events[i]]
+        indices = [i for i in side_events if i not in placed]
+        fixed = []
+        for i in placed:
+            edge = side * (events[i]['x'] - 0.5) * scale
+            placements[i] = {'lane': None, 'x': round(0.5 + side * edge, 4)}
+            fixed.append((extent(events[i]), edge, print_label_width(events[i]['lines'], font_pt)))
+        positions, heights = zip(*map(extent, [events[i] for i in indices])) if indices else ((), ())
+        widths = [print_label_width(events[i]['lines'], font_pt) for i in indices]
+        first = abs(PRINT_FIRST_LANE[country] - 0.5)
+        side_layout = layout_side(
+            positions, heights, widths, first, PRINT_LANE_GAP, limit=PRINT_MAX_DEPTH if fit else None, fixed=fixed,
+        )
+        if side_layout is None:
+            return None
+        lanes, edges = side_layout
+        for i, lane, edge in zip(indices, lanes, edges):
+            placements[i] = {'lane': lane, 'x': round(0.5 + side * edge, 4)}
+    return placements
+
+
+def layout_book(events, start_year, end_year):
+    """
+    (font size, placements) of the one-page book figure of events, with
+    their hand-placed labels, at the largest label font from PRINT_FONT_PT
+    down to PRINT_MIN_FONT_PT that fits on the page, or None if none does.
+    """
+    font_pt = PRINT_FONT_PT
+    while font_pt >= PRINT_MIN_FONT_PT:
+        placements = layout_print(events, start_year, end_year, overrides=True, font_pt=font_pt)
+        if placements is not None:
+            return font_pt, placements
+        font_pt -= PRINT_FONT_STEP_PT
+    return None
+
+
+def paginate(events, start_year, end_year, page_years=None):
+    """
+    Split events (sorted by date) into matplotlib pages whose labels fit, as
+    a list of ((start year, end year), events, placements). Starts from one
+    page for the whole range, or one per page_years-aligned span, skipping
+    empty ones. A page that overflows is split at its middle year (a
+    multiple of 5 on spans of 10 years or more), and a single year that
+    overflows continues on further pages with the same range; one label
+    alone always gets its page.
+    """
+    def split(on_page, start, end):
+        if not on_page:
+            return []
+        placements = layout_print(on_page, start, end, fit=len(on_page) > 1)
+        if placements is not None:
+            return [((start, end), on_page, placements)]
+        if end - start > 1:
+            middle = (start + end) // 2
+            if end - start >= 10:
+                middle = middle // 5 * 5
+            before = [event for event in on_page if event['day'].year < middle]
+            return split(before, start, middle) + split(on_page[len(before):], middle, end)
+        half = len(on_page) // 2
+        return split(on_page[:half], start, end) + split(on_page[half:], start, end)
+
+    if page_years is None:
+        if events[-1]['day'] > date(end_year, 1, 1):
+            end_year += 5  # keep the last event on the last page's axis
+        return split(events, start_year, end_year)
+    pages = []
+    first_page = events[0]['day'].year // page_years * page_years
+    for page_start in range(first_page, events[-1]['day'].year + 1, page_years):
+        on_page = [event for event in events if page_start <= event['day'].year < page_start + page_years]
+        pages += split(on_page, page_start, page_start + page_years)
+    return pages
+
+
+def build_layout(data, source):
+    events = sorted(
+        ({**item, 'lines': get_label(item), 'day': date.fromisoformat(item['date'])} for item in data),
+        key=lambda item: item['day'],
+    )
+
+    # Matplotlib: each timeline on one page, with the hand-placed labels and
+    # the font shrunk as needed, or else on as few pages as fit; then on
+    # decade pages
+    timelines = {}
+    for name, categories in TIMELINES.items():
+        members = [event for event in events if event['category'] in categories]
+        if not members:
+            continue
+        start_year, end_year = year_range([event['day'] for event in members])
+        book = layout_book(members, start_year, end_year)
+        if book is not None:
+            font_size, placements = book
+            book_pages = [((start_year, end_year), members, placements)]
+        else:
+            font_size, book_pages = PRINT_FONT_PT, paginate(members, start_year, end_year)
+        pages = []
+        for page, (years, on_page, placements) in enumerate(book_pages):
+            pages.append(list(years))
+            for event, placement in zip(on_page, placements):
+                if placement is not None:
+                    event['print'] = {'timeline': name, 'page': page, **placement}
+
+        decade_pages = []
+        for page, (years, on_page, placements) in enumerate(paginate(members, start_year, end_year, PAGE_YEARS)):
+            decade_pages.append(list(years))
+            for event, placement in zip(on_page, placements):
+                if placement is not None:
+                    event['print']['decade'] = {'page': page, **placement}
+        timelines[name] = {
+            'categories': list(categories),
+            'years': [start_year, end_year],
+            'pages': pages,
+            'font_size': font_size,
+            'decade_pages': decade_pages,
+        }
+
+    # D3: labels are centered on their date, extend along time by their width
+    # and away from the axis by their height, in SVG px
+    start_year, end_year = year_range([event['day'] for event in events])
+    if events[-1]['day'] > date(end_year, 1, 1):
+        end_year += 5  # keep the last event inside the axis
+    first_day, last_day = date(start_year, 1, 1).toordinal(), date(end_year, 1, 1).toordinal()
+    depth = 0
+    for country, side in SIDES.items():
+        side_events = [event for event in events if event['country'] == country]
+        positions = [(event['day'].toordinal() - first_day) / (last_day - first_day) * WEB_WIDTH
+                     for event in side_events]
+        widths = [max(map(len, event['lines'])) * CHAR_WIDTH_EM * WEB_FONT_PX + WEB_GAP_PX for event in side_events]
+        heights = [len(event['lines']) * LINE_HEIGHT_EM * WEB_FONT_PX for event in side_events]
+        lanes, edges = layout_side(positions, widths, heights, WEB_LANE_BASE, WEB_LANE_GAP)
+        for event, x, lane, edge, height in zip(side_events, positions, lanes, edges, heights):
+            event['web'] = {'lane': lane, 'x': round(x, 1), 'y': side * edge}
+            depth = max(depth, edge + height)
+
+    for event in events:
+        del event['day']
+        for field in ('label', 'wrap', 'x'):
+            event.pop(field, None)
+    return {
+        'version': LAYOUT_VERSION,
+        'source': source,
+        'timelines': timelines,
+        'web': {
+            'width': WEB_WIDTH,
+            'height': round(2 * depth),
+            'domain': [f'{start_year}-01-01', f'{end_year}-01-01'],
+        },
+        'events': events,
+    }
+
+
+def source_hash(path=data_path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_layout():
+    """Lay out data.json and write data.layout.json; returns the layout."""
+    with span('load'):
+        with open(data_path, encoding='utf-8') as f:
+            data = json.load(f)
+        source = source_hash()
+
+    with span('aggregate'):
+        layout = build_layout(data, source)
+
+    with span('write output'):
+        tmp_path = f'{layout_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(layout, f, ensure_ascii=False, indent=1)
+            f.write('\n')
+        os.replace(tmp_path, layout_path)
+    return layout
+
+
+def load_layout():
+    """data.layout.json, rebuilt first if data.json or the layout code changed since it was written."""
+    try:
+        with open(layout_path, encoding='utf-8') as f:
+            layout = json.load(f)
+        if layout['version'] == LAYOUT_VERSION and layout['source'] == source_hash():
+            return layout
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return write_layout()
+
+
+if __name__ == '__main__':
+    layout = write_layout()
+    print(f"Layout of {len(layout['events'])} events saved as '{layout_path}'")
@@ -1,111 +1,124 @@
+import argparse
 import sys
-from collections import Counter
-from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
-from viz_common import QUALITATIVE_PALETTE, load_json, plotly_config, register_plotly_template
-
-script_dir = Path(__file__).resolve().parent
+from viz_common import (
+    GRANULARITY_MONTHS,
+    QUALITATIVE_PALETTE,
+    bucket_counts,
+    load_publication_cube,
+    plotly_config,
+    register_plotly_template,
+    span,
+    write_plotly_html,
+    write_plotly_spec,
+)
 
-# Load the JSON data
-data = load_json(script_dir / 'Data' / 'Publications_and_activities_data.json')
+parser = argparse.ArgumentParser(description='Build the activities-by-type-over-time chart.')
+parser.add_argument('--granularity', choices=list(GRANULARITY_MONTHS), default='quarter',
+                    help='time bucket for the bars (default: quarter)')
+args = parser.parse_args()
 
-# Process the data
-type_by_quarter = {}
-dates = []
-total_activities = 0
+script_dir = Path(__file__).resolve().parent
 
-for item in data['rows']:
-    if item['Date'] and item['Type']:
-        date = datetime.strptime(item['Date'], '%Y-%m-%d')
-        dates.append(date)
-        quarter = (date.month - 1) // 3 + 1
-        quarter_key = f"{date.year}-Q{quarter}"
-        if quarter_key not in type_by_quarter:
-            type_by_quarter[quarter_key] = Counter()
-        type_by_quarter[quarter_key][item['Type']] += 1
-        total_activities += 1
+with span('load'):
+    # Activities per (Type, Month), from the cached aggregate cube
+    cube = load_publication_cube(script_dir / 'Data' / 'Publications_and_activities_data.json')
+    type_by_month = cube.rollup('Type', 'Month')
+    total_activities = int(type_by_month.sum())
 
-if not dates:
+if not total_activities:
     raise SystemExit("No rows with both Date and Type found - nothing to plot.")
 
-# Generate all quarters between the first and last quarter present in the data
-min_year, max_year = min(dates).year, max(dates).year
-all_quarters = [f"{year}-Q{quarter}" for year in range(min_year, max_year + 1) for quarter in range(1, 5)]
-last_quarter = f"{max(dates).year}-Q{(max(dates).month - 1) // 3 + 1}"
-all_quarters = all_quarters[:all_quarters.index(last_quarter) + 1]
-
-# Prepare data for plotting
-types = sorted(set(type for counts in type_by_quarter.values() for type in counts))
-
-# Extend the shared palette so all 12 types get a distinct color
-palette = QUALITATIVE_PALETTE + ['#1f78b4', '#b15928', '#7570b3', '#737373']
-
-# Create traces for each publication type
-traces = []
-for i, type_name in enumerate(types):
-    counts = [type_by_quarter.get(quarter, Counter())[type_name] for quarter in all_quarters]
-    color = palette[i % len(palette)]
-    # Replace zeros with None to hide them in hover
-    counts_with_none = [c if c > 0 else None for c in counts]
-    trace = go.Bar(
-        x=all_quarters,
-        y=counts_with_none,
-        name=type_name,
-        marker=dict(
-            color=color,
-            line=dict(width=0)
+with span('aggregate'):
+    # Count activities per (Type, period), every period from the start of the
+    # first year to the last period present in the data
+    type_by_period, types, all_periods = bucket_counts(
+        pd.to_datetime(type_by_month.index.get_level_values('Month'), format='%Y-%m'),
+        type_by_month.index.get_level_values('Type'),
+        args.granularity,
+        weights=type_by_month.to_numpy(),
+    )
+    type_by_period = type_by_period.astype(int)
+
+    # One labelled tick per year
+    periods_per_year = 12 // GRANULARITY_MONTHS[args.granularity]
+
+with span('build figure'):
+    # Extend the shared palette so all 12 types get a distinct color
+    palette = QUALITATIVE_PALETTE + ['#1f78b4', '#b15928', '#7570b3', '#737373']
+
+    # Create traces for each publication type
+    traces = []
+    for i, type_name in enumerate(types):
+        counts = type_by_period[i]
+        color = palette[i % len(palette)]
+        # Replace zeros with None to hide them in hover
+        counts_with_none = np.where(counts > 0, counts, None)
+        trace = go.Bar(
+            x=all_periods,
+            y=counts_with_none,
+            name=type_name,
+            marker=dict(
+                color=color,
+                line=dict(width=0)
+            ),
+            hovertemplate=f'{type_name}: %{{y}}<extra></extra>'
+        )
+        traces.append(trace)
+
+    register_plotly_template()
+
+    layout = go.Layout(
+        title=dict(
+            text=f'Publications & Activities by Type Over Time (Total: {total_activities})',
+            y=0.95,
+            yanchor='top'
+        ),
+        xaxis=dict(
+            title=dict(text='Year'),
+            tickangle=0,
+            tickmode='array',
+            tickvals=all_periods[::periods_per_year],  # Show one tick per year to avoid overcrowding
+            ticktext=[p.split('-')[0] for p in all_periods[::periods_per_year]],  # Show only year for these ticks
+            range=[-0.5, len(all_periods) - 0.5],  # End the x-axis at the last period with data
+            rangeslider=dict(visible=True, thickness=0.08),  # Zoom into any period
+        ),
+        yaxis=dict(
+            title=dict(text='Count'),
+        ),
+        barmode='stack',
+        bargap=0.15,
+        hovermode='x unified',
+        hoverlabel=dict(namelength=-1),
+        legend=dict(
+            orientation='v',
+            yanchor='top',
+            y=1,
+            xanchor='left',
+            x=1.02,
+            bgcolor='rgba(255,255,255,0.9)',
+            bordercolor='#eee',
+            borderwidth=1,
+            title=dict(text='Type', font=dict(size=13))
         ),
-        hovertemplate=f'{type_name}: %{{y}}<extra></extra>'
+        height=650,
+        margin=dict(l=60, r=150, t=60, b=60)
     )
-    traces.append(trace)
-
-register_plotly_template()
-
-layout = go.Layout(
-    title=dict(
-        text=f'Publications & Activities by Type Over Time (Total: {total_activities})',
-        y=0.95,
-        yanchor='top'
-    ),
-    xaxis=dict(
-        title=dict(text='Year'),
-        tickangle=0,
-        tickmode='array',
-        tickvals=all_quarters[::4],  # Show every 4th tick to avoid overcrowding
-        ticktext=[q.split('-')[0] for q in all_quarters[::4]],  # Show only year for these ticks
-        range=[-0.5, len(all_quarters) - 0.5],  # End the x-axis at the last quarter with data
-        rangeslider=dict(visible=True, thickness=0.08),  # Zoom into any period
-    ),
-    yaxis=dict(
-        title=dict(text='Count'),
-    ),
-    barmode='stack',
-    bargap=0.15,
-    hovermode='x unified',
-    hoverlabel=dict(namelength=-1),
-    legend=dict(
-        orientation='v',
-        yanchor='top',
-        y=1,
-        xanchor='left',
-        x=1.02,
-        bgcolor='rgba(255,255,255,0.9)',
-        bordercolor='#eee',
-        borderwidth=1,
-        title=dict(text='Type', font=dict(size=13))
-    ),
-    height=650,
-    margin=dict(l=60, r=150, t=60, b=60)
-)
 
-fig = go.Figure(data=traces, layout=layout)
+    fig = go.Figure(data=traces, layout=layout)
 
-# Save the figure as an HTML file in the same directory as the script
-output_path = script_dir / 'activities_type_over_time.html'
-fig.write_html(output_path, config=plotly_config('activities_type_over_time', width=1200))
+with span('write output'):
+    # Save the figure as an HTML file in the same directory as the script
+    output_path = script_dir / 'activities_type_over_time.html'
+    config = plotly_config('activities_type_over_time', width=1200)
+    write_plotly_html(fig, output_path, config=config)
+    # Drawn by report_dashboard.py without re-running this script
+    write_plotly_spec(fig, output_path.with_suffix('.spec.json'), config=config)
 
 print(f"Chart saved as: {output_path}")
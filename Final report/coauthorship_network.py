@@ -0,0 +1,248 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
+from viz_common import (
+    AXIS_LINE_COLOR,
+    load_publications,
+    plotly_config,
+    register_plotly_template,
+    span,
+    write_plotly_html,
+    write_plotly_spec,
+)
+
+# Node colors by number of distinct co-authors, as in collaborators_country.py
+COLOR_SCALE = ['#c6e5f5', '#8dcde3', '#4db6d1', '#2596be', '#1a759f', '#1e6091', '#184e77']
+
+# Bytes of pairwise offsets computed at once by the layout's repulsion step,
+# which bounds its memory regardless of the number of authors
+LAYOUT_CHUNK_BYTES = 32 * 2**20
+
+# Cells per side of the layout's repulsion grid, per fourth root of the node
+# count: about 3 * sqrt(n) cells, which balances exact near-cell pairs
+# against far-cell terms
+LAYOUT_GRID_FACTOR = 1.7
+
+
+def coauthor_edges(author_lists):
+    """
+    Intern the names in a Series of 'Name|Name|...' strings into an index and
+    return (names, publications per author, edge sources, edge targets, edge
+    weights): one edge per co-authoring pair, with source < target and the
+    number of publications they share as weight.
+    """
+    authors = author_lists.fillna('').str.split('|').explode().str.strip()
+    authors = authors[authors != '']
+    codes, names = pd.factorize(authors)
+    # (publication, author) pairs, each author counted once per publication
+    memberships = pd.DataFrame({'publication': authors.index, 'author': codes}).drop_duplicates()
+    publications_per_author = np.bincount(memberships['author'], minlength=len(names))
+
+    pairs = memberships.merge(memberships, on='publication')
+    pairs = pairs[pairs['author_x'] < pairs['author_y']]
+    edge_keys, weights = np.unique(
+        pairs['author_x'].to_numpy(np.int64) * len(names) + pairs['author_y'].to_numpy(np.int64),
+        return_counts=True,
+    )
+    return list(names), publications_per_author, edge_keys // len(names), edge_keys % len(names), weights
+
+
+def grid_repulsion(positions, k):
+    """
+    The Fruchterman-Reingold repulsion on each node (k^2 / distance, away
+    from every other node), approximated on a grid of about 3 * sqrt(n)
+    cells: nodes in the same or an adjacent cell repel exactly, and every
+    farther cell acts as one node of its size at its centroid. That is
+    O(n^1.5) per step instead of O(n^2). Both passes are computed in chunks
+    of about LAYOUT_CHUNK_BYTES. Returns an (n, 2) array.
+    """
+    node_count = len(positions)
+    side = max(1, int(np.ceil(LAYOUT_GRID_FACTOR * node_count ** 0.25)))
+    low = positions.min(axis=0)
+    extent = np.maximum(positions.max(axis=0) - low, 1e-9)
+    cell_xy = np.minimum((positions - low) / extent * side, side - 1).astype(np.int64)
+    cell = cell_xy[:, 0] * side + cell_xy[:, 1]
+    x, y = positions.T
+    displacement = np.zeros_like(positions)
+
+    # The (up to nine) cells around each node's own
+    offsets = np.array([(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)])
+    neighbour_xy = cell_xy[:, None, :] + offsets  # (n, 9, 2)
+    valid = ((neighbour_xy >= 0) & (neighbour_xy < side)).all(axis=2)
+    neighbour = np.where(valid, neighbour_xy[..., 0] * side + neighbour_xy[..., 1], 0)
+    counts = np.bincount(cell, minlength=side * side)
+    neighbour_counts = np.where(valid, counts[neighbour], 0)
+
+    # Far field: every node against the centroid of every occupied cell,
+    # weighted by its node count, except the cells around its own
+    occupied = np.flatnonzero(counts)
+    masses = counts[occupied].astype(np.float32)
+    centroid_x = np.bincount(cell, weights=x)[occupied].astype(np.float32) / masses
+    centroid_y = np.bincount(cell, weights=y)[occupied].astype(np.float32) / masses
+    column = np.zeros(side * side, dtype=np.int64)
+    column[occupied] = np.arange(len(occupied))
+    near_rows, near_slots = np.nonzero(neighbour_counts)
+    near_columns = column[neighbour[near_rows, near_slots]]
+    chunk = max(1, LAYOUT_CHUNK_BYTES // (len(occupied) * 3 * 4))
+    for start in range(0, node_count, chunk):
+        rows = slice(start, start + chunk)
+        dx = x[rows, None] - centroid_x
+        dy = y[rows, None] - centroid_y
+        factor = dx * dx
+        factor += dy * dy
+        np.maximum(factor, 1e-9, out=factor)
+        np.divide(k * k * masses, factor, out=factor)
+        in_chunk = slice(*np.searchsorted(near_rows, [start, start + chunk]))
+        factor[near_rows[in_chunk] - start, near_columns[in_chunk]] = 0
+        displacement[rows, 0] = np.einsum('ij,ij->i', dx, factor)
+        displacement[rows, 1] = np.einsum('ij,ij->i', dy, factor)
+
+    # Near field: exact pairs between each node and the nodes of the cells
+    # around its own, read from the coordinates sorted by cell
+    order = np.argsort(cell, kind='stable')
+    sorted_x, sorted_y = x[order], y[order]
+    neighbour_starts = (np.cumsum(counts) - counts)[neighbour]
+    # Every node is paired with at least itself (a zero offset, so it adds
+    # nothing), which keeps each node's run of pairs non-empty for reduceat
+    pair_counts = neighbour_counts.sum(axis=1)
+    pair_ends = np.cumsum(pair_counts)
+    # Nodes per chunk so that each chunk's pairs (an index and three floats
+    # each, plus temporaries) take about LAYOUT_CHUNK_BYTES
+    pairs_per_chunk = max(1, LAYOUT_CHUNK_BYTES // 48)
+    start = 0
+    while start < node_count:
+        done = pair_ends[start - 1] if start else 0
+        end = max(start + 1, int(np.searchsorted(pair_ends, done + pairs_per_chunk, side='right')))
+        block_counts = neighbour_counts[start:end].ravel()
+        first = np.cumsum(block_counts) - block_counts
+        sorted_index = (np.repeat(neighbour_starts[start:end].ravel() - first, block_counts)
+                        + np.arange(first[-1] + block_counts[-1]))
+        dx = np.repeat(x[start:end], pair_counts[start:end]) - sorted_x[sorted_index]
+        dy = np.repeat(y[start:end], pair_counts[start:end]) - sorted_y[sorted_index]
+        factor = dx * dx
+        factor += dy * dy
+        np.maximum(factor, 1e-9, out=factor)
+        np.divide(k * k, factor, out=factor)
+        runs = pair_ends[start:end] - pair_counts[start:end] - done
+        displacement[start:end, 0] += np.add.reduceat(dx * factor, runs)
+        displacement[start:end, 1] += np.add.reduceat(dy * factor, runs)
+        start = end
+    return displacement
+
+
+def force_layout(node_count, sources, targets, weights, iterations=300, seed=0):
+    """
+    Fruchterman-Reingold layout in the unit square, vectorized with NumPy:
+    nodes repel each other (see grid_repulsion), edges pull their ends
+    together in proportion to their weight, and a weak pull to the center
+    keeps disconnected authors in view. Returns an (n, 2) array of positions.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.random((node_count, 2), dtype=np.float32)
+    if node_count < 2:
+        return positions.astype(float)
+
+    k = np.float32(1 / np.sqrt(node_count))  # ideal edge length
+    edge_weights = weights[:, None].astype(np.float32)
+    for step in range(iterations):
+        displacement = grid_repulsion(positions, k)
+
+        delta = positions[sources] - positions[targets]
+        distance = np.sqrt((delta ** 2).sum(axis=1, keepdims=True))
+        attraction = delta * distance / k * edge_weights
+        np.add.at(displacement, sources, -attraction)
+        np.add.at(displacement, targets, attraction)
+
+        displacement -= (positions - positions.mean(axis=0)) * (node_count * k)
+
+        # Move each node along its displacement, at most a temperature that
+        # cools linearly from 0.1 to 0
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1, keepdims=True)), 1e-9)
+        positions += displacement / length * np.minimum(length, 0.1 * (1 - step / iterations))
+
+    # Rescale to [0, 1] on both axes, keeping the aspect ratio
+    positions = positions.astype(float)
+    positions -= positions.min(axis=0)
+    return positions / max(positions.max(), 1e-9)
+
+
+parser = argparse.ArgumentParser(description='Build the co-authorship network chart.')
+parser.add_argument('--iterations', type=int, default=300, help='layout iterations (default: 300)')
+parser.add_argument('--seed', type=int, default=0, help='seed of the initial layout (default: 0)')
+args = parser.parse_args()
+
+script_dir = Path(__file__).resolve().parent
+
+with span('load'):
+    # Load the publications; Author(s) holds pipe-delimited names
+    publications = load_publications(script_dir / 'Data' / 'Publications_and_activities_data.json')
+
+with span('aggregate'):
+    # Author index and sparse (edge list) co-authorship adjacency
+    names, publication_counts, sources, targets, weights = coauthor_edges(publications['Author(s)'])
+    if not names:
+        raise SystemExit("No authors found - nothing to plot.")
+    coauthor_counts = np.bincount(sources, minlength=len(names)) + np.bincount(targets, minlength=len(names))
+
+with span('layout'):
+    # Positions are computed here, once, so the browser only draws them
+    positions = force_layout(len(names), sources, targets, weights, iterations=args.iterations, seed=args.seed)
+
+with span('build figure'):
+    register_plotly_template()
+
+    # All edges as one WebGL trace: segments separated by NaN gaps
+    edge_x = np.column_stack([positions[sources, 0], positions[targets, 0], np.full(len(sources), np.nan)])
+    edge_y = np.column_stack([positions[sources, 1], positions[targets, 1], np.full(len(sources), np.nan)])
+    edges = go.Scattergl(
+        x=edge_x.ravel(),
+        y=edge_y.ravel(),
+        mode='lines',
+        line=dict(width=1, color=AXIS_LINE_COLOR),
+        hoverinfo='skip',
+        showlegend=False,
+    )
+
+    nodes = go.Scattergl(
+        x=positions[:, 0],
+        y=positions[:, 1],
+        mode='markers',
+        text=names,
+        customdata=np.column_stack([publication_counts, coauthor_counts]),
+        marker=dict(
+            size=6 + 3 * np.sqrt(publication_counts - 1),
+            color=coauthor_counts,
+            colorscale=COLOR_SCALE,
+            line=dict(width=1, color='white'),
+        ),
+        hovertemplate=(
+            '<b>%{text}</b><br>Publications: %{customdata[0]}<br>Co-authors: %{customdata[1]}<extra></extra>'
+        ),
+        showlegend=False,
+    )
+
+    fig = go.Figure(data=[edges, nodes])
+    fig.update_layout(
+        title=f'Co-authorship Network ({len(names)} authors, {len(sources)} co-author pairs)',
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False, scaleanchor='x'),
+        hovermode='closest',
+        margin=dict(l=20, r=20, t=60, b=20),
+        height=700,
+    )
+
+with span('write output'):
+    # Save the chart as an interactive HTML file
+    output_path = script_dir / 'coauthorship_network.html'
+    config = plotly_config('coauthorship_network', height=700)
+    write_plotly_html(fig, output_path, config=config)
+    # Drawn by report_dashboard.py without re-running this script
+    write_plotly_spec(fig, output_path.with_suffix('.spec.json'), config=config)
+
+print(f"Chart saved as: {output_path}")
@@ -1,180 +1,453 @@
+import argparse
+import json
 import math
 import sys
 from pathlib import Path
 
 import folium
-import pandas as pd
-from branca.element import Element
+import numpy as np
+from branca.element import Element, MacroElement
 from folium import IFrame
+from jinja2 import Template
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
-from viz_common import create_base_map, load_json
+from viz_common import create_base_map, load_collaborators, marker_layer, span
 
 MARKER_COLOR = '#2596be'
 
+# Cluster icon (--cluster): a marker-colored circle sized by the cluster's
+# total collaborators, recovered from each marker's radius
+CLUSTER_ICON_FUNCTION = f'''
+function (cluster) {{
+    var count = cluster.getAllChildMarkers().reduce(function (total, marker) {{
+        return total + Math.round(Math.pow((marker.options.radius - 7) / 4, 2)) + 1;
+    }}, 0);
+    var size = 2 * (7 + 4 * Math.sqrt(count - 1));
+    return L.divIcon({{
+        html: '<div style="width:' + size + 'px; height:' + size + 'px; line-height:' + size + 'px; '
+            + 'border-radius:50%; background:{MARKER_COLOR}; opacity:0.85; border:2px solid white; '
+            + 'box-sizing:border-box; color:white; font-weight:600; text-align:center;">' + count + '</div>',
+        className: '',
+        iconSize: L.point(size, size)
+    }});
+}}
+'''
+
 
 def marker_radius(count):
     """Circle radius in px, scaled by the square root of the collaborator count."""
     return 7 + 4 * math.sqrt(count - 1)
 
-script_dir = Path(__file__).resolve().parent
 
-# Load the data
-data = load_json(script_dir / 'Data' / 'Collaborators_data.json')
-df = pd.DataFrame(data)
-
-# Group the data by affiliation to aggregate collaborators
-grouped = df.groupby('Affiliation')
-
-# Create the world map
-m = create_base_map(location=[20, 0], zoom_start=2)
-
-# Tooltip styling (popups are iframes and carry their own inline CSS)
-custom_css = '''
-<style>
-.leaflet-tooltip.custom-tooltip {
-    background-color: white;
-    border: none;
-    border-radius: 6px;
-    padding: 8px 12px;
-    font-family: 'Open Sans', Arial, sans-serif;
-    font-size: 13px;
-    font-weight: 500;
-    color: #333;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.2);
-}
-</style>
-<link href="https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap" rel="stylesheet">
-'''
-m.get_root().html.add_child(Element(custom_css))
+# Aggregation grid cell size, in screen px at each zoom level: bounds the
+# circles drawn at once to about (map width / CELL_PX) x (map height / CELL_PX)
+CELL_PX = 64
 
-# Create a feature group for collaborators
-collaborators_group = folium.FeatureGroup(name='Collaborators')
+# Deepest zoom level to aggregate, if cells still merge affiliations there
+MAX_AGGREGATE_ZOOM = 18
 
-# Count total collaborators
-total_collaborators = len(df)
 
-# Iterate over each affiliation group
-for affiliation, group in grouped:
-    # Parse the first row to get the location
-    try:
-        location = [float(coord) for coord in group.iloc[0]['Coordinate location'].split(',')]
-    except ValueError:
-        print(f"Skipping {affiliation} due to invalid coordinates")
-        continue
+def aggregation_levels(latitudes, longitudes, collaborators, top=3):
+    """
+    Grid-bin affiliations into CELL_PX cells for each zoom level from 0,
+    stopping at the first level where no cell merges distinct locations.
+    Each level is a list of cells: [latitude, longitude, collaborators,
+    affiliations, [indices of the top affiliations by collaborators]], with
+    the cell positioned at its collaborator-weighted centroid.
+    """
+    # Web Mercator world coordinates, in [0, 1)
+    x = (longitudes + 180) / 360
+    sin_lat = np.sin(np.radians(np.clip(latitudes, -85.0511287798, 85.0511287798)))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
 
-    # Count collaborators at this affiliation
-    collab_count = len(group)
+    # Affiliations at the very same spot never separate: stop once every
+    # cell holds a single location
+    locations = len(np.unique(np.column_stack((x, y)), axis=0))
 
-    # Generate HTML content for the popup (iframe document, so it carries its own CSS)
-    collaborator_links = ''.join(
-        [f'<li><a href="{row["URL"]}" target="_blank">{row["Collaborator"]}</a></li>'
-         for index, row in group.iterrows()]
-    )
-    popup_html = f'''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <link href="https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap" rel="stylesheet">
+    levels = []
+    for zoom in range(MAX_AGGREGATE_ZOOM + 1):
+        cells_per_side = 2 ** zoom * 256 // CELL_PX
+        column = np.minimum((x * cells_per_side).astype(np.int64), cells_per_side - 1)
+        row = np.minimum((y * cells_per_side).astype(np.int64), cells_per_side - 1)
+        keys, cell = np.unique(column * cells_per_side + row, return_inverse=True)
+        if len(keys) == locations:
+            break
+
+        totals = np.bincount(cell, weights=collaborators)
+        members = np.bincount(cell)
+        cell_lat = np.bincount(cell, weights=collaborators * latitudes) / totals
+        cell_lng = np.bincount(cell, weights=collaborators * longitudes) / totals
+
+        # Affiliations sorted by cell, then by collaborators (descending)
+        order = np.lexsort((-collaborators, cell))
+        starts = np.concatenate(([0], np.cumsum(members)[:-1]))
+        levels.append([
+            [round(cell_lat[i], 5), round(cell_lng[i], 5), int(totals[i]), int(members[i]),
+             order[starts[i]:starts[i] + min(top, members[i])].tolist()]
+            for i in range(len(keys))
+        ])
+    return levels
+
+
+class CollaboratorMarkers(MacroElement):
+    """
+    All affiliation markers as one client-side layer: the affiliation ->
+    collaborators table is embedded once as compact JSON, and popups are
+    built from a single <template> in the page when a marker is clicked.
+
+    With levels (see aggregation_levels), the layer shows the current zoom
+    level's grid cells instead, in and near the map view only, and switches
+    level as the map zooms.
+    """
+
+    _template = Template("""
+        {% macro header(this, kwargs) %}
         <style>
-            body {{
-                margin: 0;
-                padding: 10px;
-                font-family: 'Open Sans', Arial, sans-serif;
-                font-size: 14px;
-                color: #333;
-            }}
-            h4 {{
-                margin: 0 0 10px 0;
-                font-size: 15px;
-                font-weight: 600;
-                color: #333;
-                border-bottom: 1px solid #eee;
-                padding-bottom: 8px;
-            }}
-            ul {{
-                margin: 0;
-                padding: 0;
-                list-style: none;
-            }}
-            li {{
-                margin: 6px 0;
-                padding: 2px 0;
-            }}
-            a {{
-                color: #3498db;
-                text-decoration: none;
-            }}
-            a:hover {{
-                color: #2980b9;
-                text-decoration: underline;
-            }}
+        .collaborator-popup { font-family: 'Open Sans', Arial, sans-serif; font-size: 14px; color: #333;
+                              max-height: 260px; overflow-y: auto; }
+        .collaborator-popup h4 { margin: 0 0 10px 0; font-size: 15px; font-weight: 600; color: #333;
+                                 border-bottom: 1px solid #eee; padding-bottom: 8px; }
+        .collaborator-popup ul { margin: 0; padding: 0; list-style: none; }
+        .collaborator-popup li { margin: 6px 0; padding: 2px 0; }
+        .collaborator-popup a { color: #3498db; text-decoration: none; }
+        .collaborator-popup a:hover { color: #2980b9; text-decoration: underline; }
         </style>
-    </head>
-    <body>
-        <h4>{affiliation}</h4>
-        <ul>{collaborator_links}</ul>
-    </body>
-    </html>
+        {% endmacro %}
+
+        {% macro html(this, kwargs) %}
+        <template id="{{ this.get_name() }}_popup">
+            <div class="collaborator-popup"><h4></h4><ul></ul></div>
+        </template>
+        {% endmacro %}
+
+        {% macro script(this, kwargs) %}
+        (function () {
+            // Rows: [affiliation, latitude, longitude, [names], [urls]]
+            var rows = {{ this.data }};
+            var popupTemplate = document.getElementById({{ this.get_name()|tojson }} + '_popup');
+
+            function popupContent(row) {
+                var content = popupTemplate.content.firstElementChild.cloneNode(true);
+                content.querySelector('h4').textContent = row[0];
+                var list = content.querySelector('ul');
+                row[3].forEach(function (name, i) {
+                    var link = document.createElement('a');
+                    link.href = row[4][i];
+                    link.target = '_blank';
+                    link.textContent = name;
+                    list.appendChild(document.createElement('li')).appendChild(link);
+                });
+                return content;
+            }
+
+            function tooltipContent(row) {
+                var content = document.createElement('div');
+                content.appendChild(document.createElement('b')).textContent = row[0];
+                content.appendChild(document.createElement('br'));
+                content.appendChild(document.createTextNode(row[3].length + ' collaborator(s)'));
+                return content;
+            }
+
+            function circle(latlng, collaborators) {
+                return L.circleMarker(latlng, {
+                    // Same scale as marker_radius() in collaborators_map.py
+                    radius: 7 + 4 * Math.sqrt(collaborators - 1),
+                    color: 'white',
+                    weight: 2,
+                    fill: true,
+                    fillColor: {{ this.color|tojson }},
+                    fillOpacity: 0.85
+                });
+            }
+
+            function affiliationMarker(row) {
+                return circle([row[1], row[2]], row[3].length)
+                    .bindTooltip(function () { return tooltipContent(row); }, {className: 'custom-tooltip'})
+                    .bindPopup(function () { return popupContent(row); }, {maxWidth: 280});
+            }
+
+            var parent = {{ this._parent.get_name() }};
+            // Cells per zoom level: [latitude, longitude, collaborators, affiliations, [top row indices]]
+            var levels = {{ this.levels }};
+
+            if (!levels) {
+                var markers = rows.map(affiliationMarker);
+                // A marker cluster takes them in one (chunked) batch
+                if (parent.addLayers) {
+                    parent.addLayers(markers);
+                } else {
+                    markers.forEach(function (marker) { parent.addLayer(marker); });
+                }
+                return;
+            }
+
+            function cellTooltip(cell) {
+                var content = document.createElement('div');
+                content.appendChild(document.createElement('b')).textContent = cell[2] + ' collaborators';
+                content.appendChild(document.createTextNode(' at ' + cell[3] + ' affiliations'));
+                cell[4].forEach(function (i) {
+                    content.appendChild(document.createElement('br'));
+                    content.appendChild(document.createTextNode(rows[i][0] + ' (' + rows[i][3].length + ')'));
+                });
+                if (cell[3] > cell[4].length) {
+                    content.appendChild(document.createElement('br'));
+                    content.appendChild(document.createTextNode('and ' + (cell[3] - cell[4].length) + ' more'));
+                }
+                return content;
+            }
+
+            // Markers are created the first time they are shown, then reused
+            var map = {{ this.map.get_name() }};
+            var shown = L.layerGroup().addTo(parent);
+            var affiliationMarkers = [];
+            var cellMarkers = levels.map(function () { return []; });
+
+            function marker(zoom, i) {
+                var cell = levels[zoom][i];
+                if (cell[3] === 1) {
+                    var row = cell[4][0];
+                    return affiliationMarkers[row] || (affiliationMarkers[row] = affiliationMarker(rows[row]));
+                }
+                if (!cellMarkers[zoom][i]) {
+                    cellMarkers[zoom][i] = circle([cell[0], cell[1]], cell[2])
+                        .bindTooltip(function () { return cellTooltip(cell); }, {className: 'custom-tooltip'})
+                        .on('click', function () { map.setView([cell[0], cell[1]], zoom + 2); });
+                }
+                return cellMarkers[zoom][i];
+            }
+
+            // Show the current zoom's cells (every affiliation past the last
+            // level), limited to those in or near the view
+            function render() {
+                var zoom = Math.floor(map.getZoom());
+                var bounds = map.getBounds().pad(0.25);
+                shown.clearLayers();
+                if (zoom < levels.length) {
+                    levels[zoom].forEach(function (cell, i) {
+                        if (bounds.contains([cell[0], cell[1]])) shown.addLayer(marker(zoom, i));
+                    });
+                } else {
+                    rows.forEach(function (row, i) {
+                        if (bounds.contains([row[1], row[2]])) {
+                            shown.addLayer(affiliationMarkers[i] || (affiliationMarkers[i] = affiliationMarker(row)));
+                        }
+                    });
+                }
+            }
+            map.on('moveend', render);
+            render();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, affiliations, color, levels=None, map=None):
+        super().__init__()
+        self._name = 'CollaboratorMarkers'
+        rows = [
+            [affiliation, round(latitude, 6), round(longitude, 6), names, urls]
+            for affiliation, latitude, longitude, names, urls in zip(
+                affiliations.index, affiliations['Latitude'], affiliations['Longitude'],
+                affiliations['Collaborator'], affiliations['URL'],
+            )
+        ]
+        # Compact JSON, safe to inline in a <script> block
+        self.data = json.dumps(rows, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        self.levels = json.dumps(levels, separators=(',', ':'))
+        self.color = color
+        self.map = map
+
+
+parser = argparse.ArgumentParser(description='Build the collaborators map.')
+parser.add_argument('--popup-mode', choices=['client', 'iframe'], default='client',
+                    help="'client': one embedded data table and popup template (default); "
+                         "'iframe': a standalone HTML document per marker")
+parser.add_argument('--cluster', action='store_true',
+                    help='group nearby affiliations into clusters sized by their total collaborators')
+parser.add_argument('--canvas', action='store_true',
+                    help='draw the markers on a canvas instead of as SVG elements (for thousands of affiliations)')
+parser.add_argument('--basemap', metavar='URL',
+                    help="local tile URL template, e.g. 'tiles/{z}/{x}/{y}.png' (see python -m remoboko tiles)")
+parser.add_argument('--aggregate', action=argparse.BooleanOptionalAction, default=True,
+                    help='show affiliations grid-binned per zoom level (default; needs --popup-mode client, '
+                         'ignored with --cluster)')
+args = parser.parse_args()
+
+script_dir = Path(__file__).resolve().parent
+
+with span('load'):
+    # Load the data, with 'Coordinate location' pre-parsed into Latitude/Longitude
+    df = load_collaborators(script_dir / 'Data' / 'Collaborators_data.json')
+
+with span('aggregate'):
+    # One row per affiliation: the first collaborator's location, and the
+    # collaborators' names and URLs as lists
+    locations = df.drop_duplicates('Affiliation').set_index('Affiliation')[['Latitude', 'Longitude']]
+    affiliations = locations.join(df.groupby('Affiliation')[['Collaborator', 'URL']].agg(list)).sort_index()
+
+    invalid = affiliations[['Latitude', 'Longitude']].isna().any(axis=1)
+    for affiliation in affiliations.index[invalid]:
+        print(f"Skipping {affiliation} due to invalid coordinates")
+    affiliations = affiliations[~invalid]
+
+    levels = None
+    if args.aggregate and args.popup_mode == 'client' and not args.cluster:
+        levels = aggregation_levels(
+            affiliations['Latitude'].to_numpy(),
+            affiliations['Longitude'].to_numpy(),
+            affiliations['Collaborator'].str.len().to_numpy(dtype=float),
+        )
+
+with span('build figure'):
+    # Create the world map
+    m = create_base_map(location=[20, 0], zoom_start=2, prefer_canvas=args.canvas, basemap=args.basemap)
+
+    # Tooltip styling (client popups are styled by CollaboratorMarkers;
+    # iframe popups carry their own inline CSS)
+    custom_css = '''
+    <style>
+    .leaflet-tooltip.custom-tooltip {
+        background-color: white;
+        border: none;
+        border-radius: 6px;
+        padding: 8px 12px;
+        font-family: 'Open Sans', Arial, sans-serif;
+        font-size: 13px;
+        font-weight: 500;
+        color: #333;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+    }
+    </style>
+    <link href="https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap" rel="stylesheet">
     '''
+    m.get_root().html.add_child(Element(custom_css))
 
-    iframe = IFrame(html=popup_html, width=280, height=min(150 + collab_count * 25, 300))
-    popup = folium.Popup(iframe, parse_html=True)
-
-    # Add a circle marker for the affiliation, sized by collaborator count
-    folium.CircleMarker(
-        location=location,
-        radius=marker_radius(collab_count),
-        color='white',
-        weight=2,
-        fill=True,
-        fill_color=MARKER_COLOR,
-        fill_opacity=0.85,
-        popup=popup,
-        tooltip=folium.Tooltip(
-            f"<b>{affiliation}</b><br>{collab_count} collaborator(s)",
-            permanent=False,
-            className='custom-tooltip'
-        ),
-    ).add_to(collaborators_group)
-
-collaborators_group.add_to(m)
-
-# Add layer control
-folium.LayerControl(collapsed=False).add_to(m)
-
-# Add title
-title_html = f'''
-<div style="position: fixed; top: 20px; left: 50%; transform: translateX(-50%); z-index: 1000;
-            background: white; padding: 12px 24px; border-radius: 8px; max-width: min(80vw, 500px);
-            box-shadow: 0 2px 10px rgba(0,0,0,0.15); font-family: 'Open Sans', sans-serif;">
-    <h3 style="margin: 0; font-size: 18px; color: #333;">Collaborators Map (Total: {total_collaborators})</h3>
-</div>
-'''
-m.get_root().html.add_child(Element(title_html))
-
-# Add a size legend
-legend_rows = ''.join(
-    f'''<div style="display:flex; align-items:center; margin: 4px 0;">
-        <span style="display:inline-block; width:{2 * marker_radius(n):.0f}px; height:{2 * marker_radius(n):.0f}px;
-                     border-radius:50%; background:{MARKER_COLOR}; opacity:0.85; border:2px solid white;
-                     box-shadow: 0 0 2px rgba(0,0,0,0.4); margin-right:10px; flex-shrink:0;"></span>
-        <span>{label}</span>
-    </div>'''
-    for n, label in [(1, '1 collaborator'), (4, '4 collaborators'), (8, '8 collaborators')]
-)
-legend_html = f'''
-<div style="position: fixed; bottom: 20px; left: 20px; z-index: 1000; background: white;
-            padding: 12px 14px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.15);
-            font-family: 'Open Sans', Arial, sans-serif; font-size: 12px; color: #333;">
-    <div style="font-weight: 600; margin-bottom: 6px;">Collaborators per affiliation</div>
-    {legend_rows}
-</div>
-'''
-m.get_root().html.add_child(Element(legend_html))
+    # Create a feature group for collaborators
+    collaborators_group = marker_layer(
+        'Collaborators', cluster=args.cluster, icon_create_function=CLUSTER_ICON_FUNCTION,
+    )
+
+    # Count total collaborators
+    total_collaborators = len(df)
+
+    if args.popup_mode == 'client':
+        CollaboratorMarkers(affiliations, MARKER_COLOR, levels=levels, map=m).add_to(collaborators_group)
+    else:
+        for affiliation, latitude, longitude, names, urls in zip(
+            affiliations.index, affiliations['Latitude'], affiliations['Longitude'],
+            affiliations['Collaborator'], affiliations['URL'],
+        ):
+            collab_count = len(names)
+
+            # Generate HTML content for the popup (iframe document, so it carries its own CSS)
+            collaborator_links = ''.join(
+                f'<li><a href="{url}" target="_blank">{name}</a></li>' for name, url in zip(names, urls)
+            )
+            popup_html = f'''
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <link href="https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap"
+                      rel="stylesheet">
+                <style>
+                    body {{
+                        margin: 0;
+                        padding: 10px;
+                        font-family: 'Open Sans', Arial, sans-serif;
+                        font-size: 14px;
+                        color: #333;
+                    }}
+                    h4 {{
+                        margin: 0 0 10px 0;
+                        font-size: 15px;
+                        font-weight: 600;
+                        color: #333;
+                        border-bottom: 1px solid #eee;
+                        padding-bottom: 8px;
+                    }}
+                    ul {{
+                        margin: 0;
+                        padding: 0;
+                        list-style: none;
+                    }}
+                    li {{
+                        margin: 6px 0;
+                        padding: 2px 0;
+                    }}
+                    a {{
+                        color: #3498db;
+                        text-decoration: none;
+                    }}
+                    a:hover {{
+                        color: #2980b9;
+                        text-decoration: underline;
+                    }}
+                </style>
+            </head>
+            <body>
+                <h4>{affiliation}</h4>
+                <ul>{collaborator_links}</ul>
+            </body>
+            </html>
+            '''
+
+            iframe = IFrame(html=popup_html, width=280, height=min(150 + collab_count * 25, 300))
+            popup = folium.Popup(iframe, parse_html=True)
+
+            # Add a circle marker for the affiliation, sized by collaborator count
+            folium.CircleMarker(
+                location=[latitude, longitude],
+                radius=marker_radius(collab_count),
+                color='white',
+                weight=2,
+                fill=True,
+                fill_color=MARKER_COLOR,
+                fill_opacity=0.85,
+                popup=popup,
+                tooltip=folium.Tooltip(
+                    f"<b>{affiliation}</b><br>{collab_count} collaborator(s)",
+                    permanent=False,
+                    className='custom-tooltip'
+                ),
+            ).add_to(collaborators_group)
+
+    collaborators_group.add_to(m)
+
+    # Add layer control
+    folium.LayerControl(collapsed=False).add_to(m)
+
+    # Add title
+    title_html = f'''
+    <div style="position: fixed; top: 20px; left: 50%; transform: translateX(-50%); z-index: 1000;
+                background: white; padding: 12px 24px; border-radius: 8px; max-width: min(80vw, 500px);
+                box-shadow: 0 2px 10px rgba(0,0,0,0.15); font-family: 'Open Sans', sans-serif;">
+        <h3 style="margin: 0; font-size: 18px; color: #333;">Collaborators Map (Total: {total_collaborators})</h3>
+    </div>
+    '''
+    m.get_root().html.add_child(Element(title_html))
+
+    # Add a size legend
+    legend_rows = ''.join(
+        f'''<div style="display:flex; align-items:center; margin: 4px 0;">
+            <span style="display:inline-block; width:{2 * marker_radius(n):.0f}px; height:{2 * marker_radius(n):.0f}px;
+                         border-radius:50%; background:{MARKER_COLOR}; opacity:0.85; border:2px solid white;
+                         box-shadow: 0 0 2px rgba(0,0,0,0.4); margin-right:10px; flex-shrink:0;"></span>
+            <span>{label}</span>
+        </div>'''
+        for n, label in [(1, '1 collaborator'), (4, '4 collaborators'), (8, '8 collaborators')]
+    )
+    legend_html = f'''
+    <div style="position: fixed; bottom: 20px; left: 20px; z-index: 1000; background: white;
+                padding: 12px 14px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.15);
+                font-family: 'Open Sans', Arial, sans-serif; font-size: 12px; color: #333;">
+        <div style="font-weight: 600; margin-bottom: 6px;">Collaborators per affiliation</div>
+        {legend_rows}
+    </div>
+    '''
+    m.get_root().html.add_child(Element(legend_html))
 
-# Save the map to an HTML file in the same folder
-output_path = script_dir / 'collaborators_map.html'
-m.save(str(output_path))
+with span('write output'):
+    # Save the map to an HTML file in the same folder
+    output_path = script_dir / 'collaborators_map.html'
+    m.save(str(output_path))
 
 print(f"Map saved to: {output_path}")
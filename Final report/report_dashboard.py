@@ -0,0 +1,203 @@
+import html
+import json
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
+from viz_common import FONT_FAMILY, GRID_COLOR, MUTED_TEXT_COLOR, TEXT_COLOR, load_json, span, write_plotly_js
+
+script_dir = Path(__file__).resolve().parent
+output_path = script_dir / 'report_dashboard.html'
+payload_dir = script_dir / 'dashboard'
+
+# Dashboard sections, in page order. 'plotly' sections are drawn from the
+# figure spec their chart script writes next to its HTML (see
+# write_plotly_spec); 'map' and 'image' sections embed an output of another
+# builder. Paths are relative to this folder.
+SECTIONS = [
+    {'name': 'treemap', 'kind': 'plotly', 'src': 'treemap_chart.spec.json',
+     'title': 'Publications & activities by type, language and year'},
+    {'name': 'activities_type_over_time', 'kind': 'plotly', 'src': 'activities_type_over_time.spec.json',
+     'title': 'Activities over time'},
+    {'name': 'collaborators_by_country', 'kind': 'plotly', 'src': 'collaborators_by_country.spec.json',
+     'title': 'Collaborators by country'},
+    {'name': 'coauthorship_network', 'kind': 'plotly', 'src': 'coauthorship_network.spec.json',
+     'title': 'Co-authorship network'},
+    {'name': 'collaborators_map', 'kind': 'map', 'src': 'collaborators_map.html',
+     'title': 'Collaborators map'},
+    {'name': 'collaborators_gender', 'kind': 'image', 'src': 'collaborators_gender_white.png',
+     'title': 'Collaborators by gender'},
+    {'name': 'term_trends', 'kind': 'plotly', 'src': 'term_trends.spec.json',
+     'title': 'Rising and declining terms in abstracts'},
+    {'name': 'english_wordcloud', 'kind': 'image', 'src': 'WordClouds/english_wordcloud.png',
+     'title': 'Word cloud of English abstracts'},
+    {'name': 'french_wordcloud', 'kind': 'image', 'src': 'WordClouds/french_wordcloud.png',
+     'title': 'Word cloud of French abstracts'},
+]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>REMOBOKO final report: figures</title>
+<style>
+  body {{ margin: 0; font-family: {font}; color: {text}; background: #fafafa; }}
+  header, main {{ max-width: 1200px; margin: 0 auto; padding: 0 24px; }}
+  header h1 {{ font-size: 26px; margin: 32px 0 8px; }}
+  nav a {{ color: {muted}; margin-right: 16px; font-size: 14px; }}
+  section {{ background: white; border: 1px solid {grid}; border-radius: 6px; margin: 24px 0; padding: 16px; }}
+  section h2 {{ font-size: 18px; margin: 0 0 12px; }}
+  .figure {{ min-height: 600px; display: flex; align-items: center; justify-content: center; }}
+  .figure[data-kind="image"] {{ min-height: 0; }}
+  .figure img {{ max-width: 100%; height: auto; }}
+  .figure iframe {{ width: 100%; height: 600px; border: 0; }}
+  .figure > .plot {{ width: 100%; }}
+  .placeholder {{ color: {muted}; font-size: 14px; }}
+</style>
+</head>
+<body>
+<header>
+  <h1>REMOBOKO final report: figures</h1>
+  <nav>{nav}</nav>
+</header>
+<main>
+{sections}
+</main>
+<script>
+// Figures are fetched and drawn only when their section nears the viewport,
+// and torn down again once it is far away, so first paint is quick and
+// memory stays bounded however far the reader scrolls. Payloads are
+// <script> files (not fetch()ed JSON) so the page also works from file://.
+(function () {{
+  const PLOTLY_SRC = {plotly_src};
+  const scripts = {{}};
+  const specs = {{}};
+
+  function loadScript(src) {{
+    if (!scripts[src]) {{
+      scripts[src] = new Promise(function (resolve, reject) {{
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = resolve;
+        script.onerror = function () {{ reject(new Error('Could not load ' + src)); }};
+        document.head.appendChild(script);
+      }});
+    }}
+    return scripts[src];
+  }}
+
+  // Called by each dashboard/<name>.js payload
+  window.remobokoDashboard = {{
+    register: function (name, spec) {{ specs[name] = spec; }}
+  }};
+
+  function show(figure) {{
+    const kind = figure.dataset.kind;
+    figure.dataset.visible = 'true';
+    if (kind === 'map') {{
+      const iframe = document.createElement('iframe');
+      iframe.src = figure.dataset.src;
+      iframe.title = figure.dataset.title;
+      figure.replaceChildren(iframe);
+    }} else if (kind === 'plotly') {{
+      const name = figure.dataset.name;
+      Promise.all([loadScript(PLOTLY_SRC), loadScript(figure.dataset.src)]).then(function () {{
+        // Skip if the section scrolled away while loading
+        if (figure.dataset.visible !== 'true') return;
+        const spec = specs[name];
+        const plot = document.createElement('div');
+        plot.className = 'plot';
+        figure.replaceChildren(plot);
+        Plotly.newPlot(plot, spec.figure.data, spec.figure.layout, spec.config);
+      }}).catch(function (error) {{
+        figure.querySelector('.placeholder').textContent = error.message;
+      }});
+    }}
+  }}
+
+  function hide(figure) {{
+    figure.dataset.visible = 'false';
+    const plot = figure.querySelector('.plot');
+    if (plot) Plotly.purge(plot);
+    const placeholder = document.createElement('p');
+    placeholder.className = 'placeholder';
+    placeholder.textContent = 'Loading ' + figure.dataset.title + '…';
+    figure.replaceChildren(placeholder);
+  }}
+
+  const observer = new IntersectionObserver(function (entries) {{
+    entries.forEach(function (entry) {{
+      const visible = entry.target.dataset.visible === 'true';
+      if (entry.isIntersecting && !visible) show(entry.target);
+      else if (!entry.isIntersecting && visible) hide(entry.target);
+    }});
+  }}, {{ rootMargin: '100% 0px' }});
+
+  document.querySelectorAll('.figure:not([data-kind="image"])').forEach(function (figure) {{
+    observer.observe(figure);
+  }});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def write_payload(name, spec):
+    """Write a figure spec as dashboard/<name>.js, registering it with the page."""
+    # Let the figure fill its section instead of the script's fixed width
+    spec['figure'].setdefault('layout', {}).pop('width', None)
+    spec['figure']['layout']['autosize'] = True
+    spec['config']['responsive'] = True
+    path = payload_dir / f'{name}.js'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'remobokoDashboard.register({json.dumps(name)}, {json.dumps(spec)});\n')
+    return path
+
+
+def render_section(section):
+    title = html.escape(section['title'])
+    attributes = f'data-name="{section["name"]}" data-kind="{section["kind"]}" data-title="{title}"'
+    if section['kind'] == 'image':
+        body = f'<img src="{html.escape(section["src"])}" alt="{title}" loading="lazy" decoding="async">'
+    else:
+        attributes += f' data-src="{html.escape(section["src"])}"'
+        body = f'<p class="placeholder">Loading {title}…</p>'
+    return (
+        f'<section id="{section["name"]}">\n'
+        f'  <h2>{title}</h2>\n'
+        f'  <div class="figure" {attributes}>{body}</div>\n'
+        f'</section>'
+    )
+
+
+with span('build figure'):
+    shutil.rmtree(payload_dir, ignore_errors=True)
+    payload_dir.mkdir()
+    sections = []
+    for section in SECTIONS:
+        if not (script_dir / section['src']).exists():
+            print(f"Warning: {section['src']} not found; build it first. Skipping '{section['name']}'.")
+            continue
+        if section['kind'] == 'plotly':
+            payload = write_payload(section['name'], load_json(script_dir / section['src']))
+            sections.append({**section, 'src': payload.relative_to(script_dir).as_posix()})
+        else:
+            sections.append(section)
+
+with span('write output'):
+    page = PAGE_TEMPLATE.format(
+        font=FONT_FAMILY,
+        text=TEXT_COLOR,
+        muted=MUTED_TEXT_COLOR,
+        grid=GRID_COLOR,
+        plotly_src=json.dumps(write_plotly_js(script_dir)),
+        nav=''.join(f'<a href="#{s["name"]}">{html.escape(s["title"])}</a>' for s in sections),
+        sections='\n'.join(render_section(s) for s in sections),
+    )
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+print(f"Dashboard with {len(sections)} figures saved as '{output_path}'")
@@ -0,0 +1,282 @@
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
+from word_clouds import FRENCH_MODELS, nlp_options, open_preprocess_cache, preprocess_cached, preprocess_texts
+
+from viz_common import FONT_FAMILY, GRID_COLOR, MUTED_TEXT_COLOR, TEXT_COLOR, load_json, span
+
+# Bump when the index layout changes; the search page refuses other versions
+INDEX_VERSION = 1
+
+# A title term counts as this many abstract terms
+TITLE_WEIGHT = 2
+
+# Characters of each abstract shown under a search result
+SNIPPET_LENGTH = 240
+
+# Languages preprocess_texts supports; other rows (e.g. German) use English
+LANGUAGES = ('English', 'French')
+
+# Words as the search page splits a query: runs of letters and digits. The
+# same split is used here to collect the surface forms readers may type.
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>REMOBOKO final report: search</title>
+<style>
+  body {{ margin: 0; font-family: {font}; color: {text}; background: #fafafa; }}
+  main {{ max-width: 900px; margin: 0 auto; padding: 0 24px 48px; }}
+  h1 {{ font-size: 26px; margin: 32px 0 16px; }}
+  input {{ width: 100%; box-sizing: border-box; font: inherit; font-size: 18px; padding: 10px 14px;
+          border: 1px solid {grid}; border-radius: 6px; }}
+  #status {{ color: {muted}; font-size: 14px; margin: 12px 0; }}
+  article {{ background: white; border: 1px solid {grid}; border-radius: 6px; margin: 12px 0; padding: 12px 16px; }}
+  article h2 {{ font-size: 16px; margin: 0 0 4px; }}
+  .meta {{ color: {muted}; font-size: 13px; margin: 0 0 6px; }}
+  .snippet {{ font-size: 14px; margin: 0; }}
+</style>
+</head>
+<body>
+<main>
+  <h1>Search publications &amp; activities</h1>
+  <input id="query" type="search" placeholder="Search titles and abstracts" autofocus>
+  <p id="status"></p>
+  <div id="results"></div>
+</main>
+<script src="index.js"></script>
+<script>
+// BM25 over the prebuilt index in index.js: queries are split into words,
+// mapped to the index's lemmas through its alias table, and the last word
+// also matches as a prefix while typing. Nothing is indexed in the browser.
+(function () {{
+  const index = window.remobokoSearchIndex;
+  const K1 = 1.2, B = 0.75, MAX_RESULTS = 50, MAX_PREFIX_TERMS = 50;
+  const input = document.getElementById('query');
+  const status = document.getElementById('status');
+  const results = document.getElementById('results');
+
+  if (!index || index.version !== {version}) {{
+    status.textContent = 'The search index is missing or out of date; rebuild it with search_index.py.';
+    input.disabled = true;
+    return;
+  }}
+
+  const docCount = index.docs.length;
+  const termIds = new Map(index.terms.map(function (term, id) {{ return [term, id]; }}));
+
+  // First term id >= prefix, by binary search over the sorted terms
+  function lowerBound(prefix) {{
+    let lo = 0, hi = index.terms.length;
+    while (lo < hi) {{
+      const mid = (lo + hi) >> 1;
+      if (index.terms[mid] < prefix) lo = mid + 1; else hi = mid;
+    }}
+    return lo;
+  }}
+
+  function queryTerms(word, isLast) {{
+    const ids = new Set(index.aliases[word] || []);
+    if (termIds.has(word)) ids.add(termIds.get(word));
+    if (isLast) {{
+      for (let id = lowerBound(word); id < index.terms.length && ids.size < MAX_PREFIX_TERMS
+           && index.terms[id].startsWith(word); id++) ids.add(id);
+    }}
+    return ids;
+  }}
+
+  function search(query) {{
+    const words = query.toLowerCase().match(/[\\p{{L}}\\p{{N}}]+/gu) || [];
+    const scores = new Map();
+    const terms = new Set();
+    words.forEach(function (word, i) {{
+      queryTerms(word, i === words.length - 1 && !/\\s$/.test(query)).forEach(function (id) {{ terms.add(id); }});
+    }});
+    terms.forEach(function (id) {{
+      // postings: doc id gaps and weighted term frequencies, interleaved
+      const postings = index.postings[id];
+      const df = postings.length / 2;
+      const idf = Math.log(1 + (docCount - df + 0.5) / (df + 0.5));
+      let doc = 0;
+      for (let i = 0; i < postings.length; i += 2) {{
+        doc += postings[i];
+        const tf = postings[i + 1];
+        const norm = K1 * (1 - B + B * index.lengths[doc] / index.averageLength);
+        scores.set(doc, (scores.get(doc) || 0) + idf * tf * (K1 + 1) / (tf + norm));
+      }}
+    }});
+    return Array.from(scores).sort(function (a, b) {{ return b[1] - a[1]; }});
+  }}
+
+  function render(hits) {{
+    results.replaceChildren.apply(results, hits.slice(0, MAX_RESULTS).map(function (hit) {{
+      const doc = index.docs[hit[0]];
+      const article = document.createElement('article');
+      const title = document.createElement('h2');
+      title.textContent = doc.title;
+      const meta = document.createElement('p');
+      meta.className = 'meta';
+      meta.textContent = [doc.type, doc.year, doc.language, doc.authors].filter(Boolean).join(' · ');
+      article.append(title, meta);
+      if (doc.snippet) {{
+        const snippet = document.createElement('p');
+        snippet.className = 'snippet';
+        snippet.textContent = doc.snippet;
+        article.append(snippet);
+      }}
+      return article;
+    }}));
+  }}
+
+  function update() {{
+    const query = input.value;
+    if (!query.trim()) {{
+      status.textContent = docCount + ' publications and activities indexed.';
+      results.replaceChildren();
+      return;
+    }}
+    const hits = search(query);
+    status.textContent = hits.length + (hits.length === 1 ? ' result' : ' results')
+      + (hits.length > MAX_RESULTS ? ', showing the first ' + MAX_RESULTS : '') + '.';
+    render(hits);
+  }}
+
+  input.addEventListener('input', update);
+  update();
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def snippet(text, length=SNIPPET_LENGTH):
+    """The start of text, cut at a word boundary, with an ellipsis if shortened."""
+    text = ' '.join((text or '').split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0] + '…'
+
+
+def index_language(row):
+    """The preprocess_texts language a row is indexed with."""
+    return row['Language'] if row['Language'] in LANGUAGES else 'English'
+
+
+def surface_aliases(texts, language):
+    """
+    {surface word: [lemmas]} for every distinct word in texts, each word run
+    through the pipeline on its own, as a query word will be matched. Not
+    cached: the words are short and few compared to the texts, and caching
+    them would fill the shared preprocess cache with one row per word.
+    """
+    words = sorted({word for text in texts for word in WORD_PATTERN.findall((text or '').lower())})
+    return {word: lemmas.split() for word, lemmas in zip(words, preprocess_texts(words, language), strict=True)}
+
+
+parser = argparse.ArgumentParser(description='Build the prebuilt full-text search index and search page.')
+parser.add_argument('--no-cache', action='store_true',
+                    help='ignore the preprocessed-text cache shared with word_clouds.py')
+parser.add_argument('--draft', action='store_true',
+                    help=f'use the small {FRENCH_MODELS["draft"]} model for a fast draft build')
+parser.add_argument('--offline', action='store_true', help='never download NLTK data')
+args = parser.parse_args()
+if args.draft:
+    nlp_options['french_model'] = FRENCH_MODELS['draft']
+if args.offline:
+    nlp_options['offline'] = True
+
+script_dir = Path(__file__).resolve().parent
+output_dir = script_dir / 'search'
+
+with span('load'):
+    rows = load_json(script_dir / 'Data' / 'Publications_and_activities_data.json')['rows']
+
+cache = None if args.no_cache else open_preprocess_cache()
+
+with span('aggregate'):
+    # Weighted term frequencies per document, from the same tokenization and
+    # lemmatization as the word clouds
+    term_counts = [Counter() for _ in rows]
+    aliases = {}
+    for language in LANGUAGES:
+        ids = [i for i, row in enumerate(rows) if index_language(row) == language]
+        texts = [rows[i]['Title'] for i in ids] + [rows[i]['Abstract'] for i in ids]
+        if cache is None:
+            processed = list(preprocess_texts(texts, language))
+        else:
+            processed = list(preprocess_cached(texts, language, cache))
+        for i, title, abstract in zip(ids, processed[:len(ids)], processed[len(ids):], strict=True):
+            for term in title.split():
+                term_counts[i][term] += TITLE_WEIGHT
+            term_counts[i].update(abstract.split())
+
+        for word, lemmas in surface_aliases(texts, language).items():
+            for lemma in lemmas:
+                if lemma != word:
+                    aliases.setdefault(word, set()).add(lemma)
+
+    if cache is not None:
+        cache.close()
+
+    # Term dictionary (sorted, so the page can prefix-search it) and postings
+    terms = sorted({term for counts in term_counts for term in counts})
+    term_ids = {term: i for i, term in enumerate(terms)}
+    postings = [[] for _ in terms]
+    last_doc = [0] * len(terms)
+    for doc, counts in enumerate(term_counts):
+        for term, count in counts.items():
+            term_id = term_ids[term]
+            postings[term_id] += [doc - last_doc[term_id], count]
+            last_doc[term_id] = doc
+    lengths = [sum(counts.values()) for counts in term_counts]
+
+    index = {
+        'version': INDEX_VERSION,
+        'docs': [
+            {
+                'title': row['Title'],
+                'type': row['Type'],
+                'language': row['Language'],
+                'year': (row['Date'] or '')[:4],
+                'authors': ', '.join(name.strip() for name in (row['Author(s)'] or '').split('|') if name.strip()),
+                'snippet': snippet(row['Abstract']),
+            }
+            for row in rows
+        ],
+        'terms': terms,
+        'postings': postings,
+        'lengths': lengths,
+        'averageLength': sum(lengths) / max(len(lengths), 1),
+        'aliases': {
+            word: sorted(term_ids[lemma] for lemma in lemmas if lemma in term_ids)
+            for word, lemmas in sorted(aliases.items())
+            if any(lemma in term_ids for lemma in lemmas)
+        },
+    }
+
+with span('write output'):
+    output_dir.mkdir(exist_ok=True)
+    # A <script> rather than fetch()ed JSON, so the page also works from file://
+    data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    with open(output_dir / 'index.js', 'w', encoding='utf-8') as f:
+        f.write(f'window.remobokoSearchIndex = {data};\n')
+    page = PAGE_TEMPLATE.format(
+        font=FONT_FAMILY,
+        text=TEXT_COLOR,
+        muted=MUTED_TEXT_COLOR,
+        grid=GRID_COLOR,
+        version=INDEX_VERSION,
+    )
+    with open(output_dir / 'index.html', 'w', encoding='utf-8') as f:
+        f.write(page)
+
+print(f"Search index of {len(rows)} documents and {len(terms)} terms saved in '{output_dir}'")
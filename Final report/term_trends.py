@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
+from word_clouds import (
+    FRENCH_MODELS,
+    keep_term,
+    nlp_options,
+    open_preprocess_cache,
+    pipeline_fingerprint,
+    preprocess_cached,
+    preprocess_texts,
+)
+
+from viz_common import (
+    QUALITATIVE_PALETTE,
+    load_json,
+    plotly_config,
+    register_plotly_template,
+    span,
+    write_plotly_html,
+    write_plotly_spec,
+)
+
+LANGUAGES = ('English', 'French')
+
+# Bump when the block layout or counting changes, to invalidate cached blocks
+BLOCK_VERSION = 1
+
+# Terms must occur this often overall, in at least MIN_YEARS years, to be ranked
+MIN_COUNT = 5
+MIN_YEARS = 2
+
+# Rising and declining terms drawn per language
+TOP_TERMS = 5
+
+script_dir = Path(__file__).resolve().parent
+block_cache_dir = script_dir / '.cache' / 'term_trends'
+
+
+def count_block(processed_texts):
+    """
+    Document-term counts of a list of processed texts, in COO form:
+    (terms, doc indices, term indices, counts), with terms sorted and each
+    (doc, term) pair once.
+    """
+    tokens = [[term for term in text.split() if keep_term(term)] for text in processed_texts]
+    lengths = np.array([len(doc_tokens) for doc_tokens in tokens], dtype=np.int64)
+    flat = np.array([term for doc_tokens in tokens for term in doc_tokens], dtype=str)
+    if not len(flat):
+        return np.array([], dtype=str), *(np.array([], dtype=np.int64) for _ in range(3))
+    terms, term_index = np.unique(flat, return_inverse=True)
+    doc_index = np.repeat(np.arange(len(tokens)), lengths)
+    keys, counts = np.unique(doc_index * len(terms) + term_index, return_counts=True)
+    return terms, keys // len(terms), keys % len(terms), counts
+
+
+def year_block(language, year, abstracts, cache):
+    """
+    The COO block of one (language, year): loaded from its .npz in
+    block_cache_dir when the pipeline and abstracts are unchanged, otherwise
+    counted from the (cached) preprocessed abstracts and saved.
+    """
+    if cache is None:
+        return count_block(list(preprocess_texts(abstracts, language)))
+
+    digest = hashlib.sha256('\0'.join(
+        [str(BLOCK_VERSION), pipeline_fingerprint(language), *abstracts]
+    ).encode('utf-8')).hexdigest()[:16]
+    path = block_cache_dir / f'{language}-{year}-{digest}.npz'
+    if path.exists():
+        with np.load(path, allow_pickle=False) as block:
+            return block['terms'], block['docs'], block['term_ids'], block['counts']
+
+    terms, docs, term_ids, counts = count_block(list(preprocess_cached(abstracts, language, cache)))
+    block_cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in block_cache_dir.glob(f'{language}-{year}-*.npz'):
+        stale.unlink()
+    tmp_path = path.with_name(f'{path.stem}.tmp.npz')
+    np.savez(tmp_path, terms=terms, docs=docs, term_ids=term_ids, counts=counts)
+    tmp_path.replace(path)
+    return terms, docs, term_ids, counts
+
+
+def stack_blocks(blocks):
+    """
+    Concatenate per-year COO blocks into one corpus matrix over a shared,
+    sorted vocabulary. Returns (terms, doc years, docs, term ids, counts),
+    where doc years gives each document's position in `blocks`.
+    """
+    terms = np.unique(np.concatenate([block[0] for _, block in blocks]))
+    doc_years, docs, term_ids, counts = [], [], [], []
+    offset = 0
+    for year_index, (doc_count, (block_terms, block_docs, block_term_ids, block_counts)) in enumerate(blocks):
+        doc_years.append(np.full(doc_count, year_index))
+        docs.append(block_docs + offset)
+        # Map the block's vocabulary onto the shared one
+        term_ids.append(np.searchsorted(terms, block_terms)[block_term_ids])
+        counts.append(block_counts)
+        offset += doc_count
+    return terms, *(np.concatenate(parts).astype(np.int64) for parts in (doc_years, docs, term_ids, counts))
+
+
+def term_trends(years, terms, doc_years, docs, term_ids, counts):
+    """
+    Per-year TF-IDF of every term, and each term's trend: the least-squares
+    slope of its TF-IDF over the years. Returns (tfidf, year counts, slopes,
+    rankable mask), with tfidf and year counts shaped (years, terms).
+    """
+    year_count, term_count = len(years), len(terms)
+    doc_count = len(doc_years)
+
+    # Year x term counts: sum the COO entries of each year's documents
+    year_counts = np.bincount(
+        doc_years[docs] * term_count + term_ids, weights=counts, minlength=year_count * term_count,
+    ).reshape(year_count, term_count)
+    totals = year_counts.sum(axis=1, keepdims=True)
+    tf = np.divide(year_counts, totals, out=np.zeros_like(year_counts), where=totals > 0)
+
+    # Smoothed IDF over documents (each COO entry is one (doc, term) pair)
+    document_frequency = np.bincount(term_ids, minlength=term_count)
+    idf = np.log((1 + doc_count) / (1 + document_frequency)) + 1
+    tfidf = tf * idf
+
+    # Slope of tfidf against the year, for all terms at once
+    x = np.asarray(years, dtype=float)
+    x -= x.mean()
+    slopes = x @ (tfidf - tfidf.mean(axis=0)) / (x @ x) if year_count > 1 else np.zeros(term_count)
+
+    rankable = (year_counts.sum(axis=0) >= MIN_COUNT) & ((year_counts > 0).sum(axis=0) >= MIN_YEARS)
+    return tfidf, year_counts, slopes, rankable
+
+
+parser = argparse.ArgumentParser(description='Build the rising and declining abstract terms chart.')
+parser.add_argument('--top', type=int, default=TOP_TERMS,
+                    help=f'rising and declining terms shown per language (default: {TOP_TERMS})')
+parser.add_argument('--no-cache', action='store_true',
+                    help='ignore the preprocessed-text and per-year matrix caches')
+parser.add_argument('--draft', action='store_true',
+                    help=f'use the small {FRENCH_MODELS["draft"]} model for a fast draft build')
+parser.add_argument('--offline', action='store_true', help='never download NLTK data')
+args = parser.parse_args()
+if args.draft:
+    nlp_options['french_model'] = FRENCH_MODELS['draft']
+if args.offline:
+    nlp_options['offline'] = True
+
+with span('load'):
+    rows = load_json(script_dir / 'Data' / 'Publications_and_activities_data.json')['rows']
+
+cache = None if args.no_cache else open_preprocess_cache()
+
+with span('aggregate'):
+    # Per language: the years with abstracts, and the trend of every term
+    trends = {}
+    for language in LANGUAGES:
+        abstracts_by_year = {}
+        for row in rows:
+            if row['Language'] == language and row['Abstract'] and row['Date']:
+                abstracts_by_year.setdefault(int(row['Date'][:4]), []).append(row['Abstract'])
+        if not abstracts_by_year:
+            continue
+        years = sorted(abstracts_by_year)
+        blocks = [
+            (len(abstracts_by_year[year]), year_block(language, year, abstracts_by_year[year], cache))
+            for year in years
+        ]
+        terms, doc_years, docs, term_ids, counts = stack_blocks(blocks)
+        if not len(terms):
+            continue
+        tfidf, year_counts, slopes, rankable = term_trends(years, terms, doc_years, docs, term_ids, counts)
+
+        order = np.argsort(slopes)
+        ranked = order[rankable[order]]
+        rising = [i for i in ranked[::-1][:args.top] if slopes[i] > 0]
+        declining = [i for i in ranked[:args.top] if slopes[i] < 0]
+        trends[language] = {
+            'years': years,
+            'terms': [(str(terms[i]), 'rising', tfidf[:, i], year_counts[:, i]) for i in rising]
+                     + [(str(terms[i]), 'declining', tfidf[:, i], year_counts[:, i]) for i in declining],
+        }
+
+    if cache is not None:
+        cache.close()
+
+if not trends:
+    raise SystemExit("No abstracts with a Date found - nothing to plot.")
+
+with span('build figure'):
+    register_plotly_template()
+
+    # One set of traces per language; the buttons show one language at a time
+    fig = go.Figure()
+    trace_languages = []
+    for language, trend in trends.items():
+        for i, (term, direction, values, term_counts) in enumerate(trend['terms']):
+            fig.add_trace(go.Scatter(
+                x=trend['years'],
+                y=values,
+                customdata=term_counts.astype(int),
+                mode='lines+markers',
+                name=f"{term} ({'↑' if direction == 'rising' else '↓'})",
+                legendgroup=direction,
+                legendgrouptitle_text='Rising' if direction == 'rising' else 'Declining',
+                line=dict(color=QUALITATIVE_PALETTE[i % len(QUALITATIVE_PALETTE)],
+                          dash='solid' if direction == 'rising' else 'dot'),
+                hovertemplate=(
+                    f'<b>{term}</b><br>%{{x}}: TF-IDF %{{y:.4f}} (%{{customdata}} occurrences)<extra></extra>'
+                ),
+                visible=language == next(iter(trends)),
+            ))
+            trace_languages.append(language)
+
+    buttons = [
+        dict(
+            label=language,
+            method='update',
+            args=[{'visible': [trace_language == language for trace_language in trace_languages]}],
+        )
+        for language in trends
+    ]
+    fig.update_layout(
+        title='Rising and Declining Terms in Abstracts (per-year TF-IDF)',
+        updatemenus=[dict(type='buttons', direction='right', buttons=buttons, x=0, xanchor='left', y=1.1)],
+        xaxis=dict(title=dict(text='Year'), dtick=1),
+        yaxis=dict(title=dict(text='TF-IDF')),
+        hovermode='closest',
+        margin=dict(l=60, r=20, t=100, b=60),
+        height=600,
+    )
+
+with span('write output'):
+    # Save the chart as an interactive HTML file
+    output_path = script_dir / 'term_trends.html'
+    config = plotly_config('term_trends')
+    write_plotly_html(fig, output_path, config=config)
+    # Drawn by report_dashboard.py without re-running this script
+    write_plotly_spec(fig, output_path.with_suffix('.spec.json'), config=config)
+
+print(f"Chart saved as: {output_path}")
@@ -1,67 +1,78 @@
 import sys
-from collections import Counter
-from datetime import datetime
 from pathlib import Path
 
 import plotly.express as px
+import plotly.graph_objects as go
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
-from viz_common import load_json, plotly_config, register_plotly_template
+from viz_common import (
+    load_publication_cube,
+    plotly_config,
+    register_plotly_template,
+    span,
+    write_plotly_html,
+    write_plotly_spec,
+)
 
 script_dir = Path(__file__).resolve().parent
 
-# Load the JSON data
-data = load_json(script_dir / 'Data' / 'Publications_and_activities_data.json')
-publications = data['rows']
-
-# Aggregate publication counts by (Type, Language, Year)
-aggregated = Counter(
-    (pub['Type'], pub['Language'], str(datetime.strptime(pub['Date'], '%Y-%m-%d').year))
-    for pub in publications
-    if pub['Type'] and pub['Language'] and pub['Date']
-)
+with span('load'):
+    # Load the cached (Type, Language, Month, Author) aggregate cube
+    cube = load_publication_cube(script_dir / 'Data' / 'Publications_and_activities_data.json')
 
-total_publications = sum(aggregated.values())
-skipped = len(publications) - total_publications
-if skipped:
-    print(f"Warning: {skipped} row(s) skipped (missing Type, Language or Date)")
+with span('aggregate'):
+    # Treemap nodes for Type > Language > Year, each valued by its publication count
+    path = ['Type', 'Language', 'Year']
+    ids, labels, parents, values = cube.treemap(path)
 
-# Convert to list for plotly
-plot_data = [
-    {'Type': k[0], 'Language': k[1], 'Year': k[2], 'Count': v}
-    for k, v in aggregated.items()
-]
+    total_publications = sum(value for value, parent in zip(values, parents) if not parent)
+    skipped = cube.total_rows - total_publications
+    if skipped:
+        print(f"Warning: {skipped} row(s) skipped (missing Type, Language or Date)")
 
-register_plotly_template()
+    # Color every node by its Type (Set2, in Type order, as px.treemap would);
+    # parents come before their children, so each node inherits its color
+    palette = px.colors.qualitative.Set2
+    node_colors = {}
+    for node_id, parent in zip(ids, parents):
+        node_colors[node_id] = node_colors[parent] if parent else palette[len(node_colors) % len(palette)]
+    colors = [node_colors[node_id] for node_id in ids]
 
-# Create treemap
-fig = px.treemap(
-    plot_data,
-    path=['Type', 'Language', 'Year'],
-    values='Count',
-    color='Type',
-    color_discrete_sequence=px.colors.qualitative.Set2,
-    title=f'Publications & Activities Treemap (Total: {total_publications})'
-)
+with span('build figure'):
+    register_plotly_template()
 
-fig.update_layout(
-    margin=dict(l=20, r=20, t=80, b=20),
-    width=1000,
-    height=700
-)
+    # Create treemap
+    fig = go.Figure(go.Treemap(
+        ids=ids,
+        labels=labels,
+        parents=parents,
+        values=values,
+        branchvalues='total',
+        marker=dict(colors=colors),
+    ))
+    fig.update_layout(
+        title=f'Publications & Activities Treemap (Total: {total_publications})',
+        margin=dict(l=20, r=20, t=80, b=20),
+        width=1000,
+        height=700
+    )
 
-# Update traces for better text display
-fig.update_traces(
-    textinfo='label+value',
-    textfont=dict(size=12),
-    hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percentParent:.1%}<extra></extra>',
-    marker=dict(
-        line=dict(width=2, color='white')
+    # Update traces for better text display
+    fig.update_traces(
+        textinfo='label+value',
+        textfont=dict(size=12),
+        hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percentParent:.1%}<extra></extra>',
+        marker=dict(
+            line=dict(width=2, color='white')
+        )
     )
-)
 
-# Save the chart as an interactive HTML file
-output_path = script_dir / 'treemap_chart.html'
-fig.write_html(output_path, config=plotly_config('treemap_chart', width=1000, height=700))
+with span('write output'):
+    # Save the chart as an interactive HTML file
+    output_path = script_dir / 'treemap_chart.html'
+    config = plotly_config('treemap_chart', width=1000, height=700)
+    write_plotly_html(fig, output_path, config=config)
+    # Drawn by report_dashboard.py without re-running this script
+    write_plotly_spec(fig, output_path.with_suffix('.spec.json'), config=config)
 
 print(f"Treemap chart has been saved as '{output_path}'")
@@ -1,15 +1,31 @@
+import argparse
+import functools
 import hashlib
+import heapq
+import itertools
 import json
-from wordcloud import WordCloud
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import nltk
+import spacy
+import wordcloud as wordcloud_module
+from matplotlib import font_manager
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
-import spacy
+from nltk.tokenize import word_tokenize
+from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
-import logging
-import os
+from wordcloud import STOPWORDS, WordCloud
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root
+from viz_common import span
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,26 +40,84 @@ os.makedirs(wordclouds_dir, exist_ok=True)
 # Define path to Data folder
 data_dir = os.path.join(current_dir, 'Data')
 
-# Download necessary NLTK data
-logging.info("Downloading NLTK data...")
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('wordnet', quiet=True)
-nltk.download('punkt_tab', quiet=True)
-
-# Load spaCy French model
-nlp_fr = spacy.load('fr_core_news_lg')
-
-# Read the JSON file
-logging.info("Reading JSON file...")
-json_path = os.path.join(data_dir, 'Publications_and_activities_data.json')
-try:
-    with open(json_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-except UnicodeDecodeError:
-    logging.warning("UTF-8 encoding failed, trying ISO-8859-1...")
-    with open(json_path, 'r', encoding='iso-8859-1') as file:
-        data = json.load(file)
+# Preprocessed abstracts are cached next to Data/ so reruns only process new
+# or edited rows
+cache_dir = os.path.join(current_dir, '.cache')
+preprocess_cache_path = os.path.join(cache_dir, 'preprocessed_abstracts.sqlite')
+layout_cache_dir = os.path.join(cache_dir, 'wordcloud_layouts')
+
+# NLTK corpora and spaCy models are looked up in this directory first. Missing
+# NLTK data is downloaded into it once; after that, runs never touch the
+# network. REMOBOKO_NLP_OFFLINE=1 (or --offline) forbids downloading at all.
+nlp_data_dir = os.environ.get('REMOBOKO_NLP_DATA', os.path.join(cache_dir, 'nlp_data'))
+nltk.data.path.insert(0, nlp_data_dir)
+
+# NLTK resources each language needs, as (resource path, download package)
+NLTK_RESOURCES = {
+    'English': [
+        ('tokenizers/punkt', 'punkt'),
+        ('tokenizers/punkt_tab', 'punkt_tab'),
+        ('corpora/stopwords', 'stopwords'),
+        ('corpora/wordnet', 'wordnet'),
+    ],
+    'French': [
+        ('corpora/stopwords', 'stopwords'),
+    ],
+}
+
+# spaCy French models: the full model for the report, the small one for fast
+# draft builds (--draft). Lemmatization only needs tok2vec, morphologizer,
+# attribute_ruler and lemmatizer, so the parser and NER are never loaded.
+FRENCH_MODELS = {'full': 'fr_core_news_lg', 'draft': 'fr_core_news_sm'}
+FRENCH_EXCLUDE = ['parser', 'ner']
+
+# French model and offline switch in use; --draft and --offline (here, in
+# search_index.py and term_trends.py) update them before any text is processed
+nlp_options = {
+    'french_model': FRENCH_MODELS['full'],
+    'offline': os.environ.get('REMOBOKO_NLP_OFFLINE') == '1',
+}
+
+# Defaults for batching abstracts through nlp.pipe
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_N_PROCESS = 1
+
+# Only the top MAX_WORDS terms are drawn, so only those need to be counted exactly
+MAX_WORDS = 200
+
+# Texts are looked up in the cache and preprocessed this many at a time
+CACHE_CHUNK_SIZE = 5000
+
+# Layout of the preprocessed-text cache table; a cache with another layout is
+# emptied. Entries unused for PREPROCESS_CACHE_MAX_AGE_DAYS are dropped.
+PREPROCESS_CACHE_SCHEMA = 2
+PREPROCESS_CACHE_MAX_AGE_DAYS = 90
+
+# WordCloud settings that determine word placement. Layouts are cached by
+# these plus the frequency table, so color, title and background changes
+# only redraw.
+LAYOUT_PARAMS = dict(
+    width=1600,
+    height=800,
+    max_words=MAX_WORDS,
+    min_font_size=10,
+    max_font_size=150,
+    relative_scaling=0.5,
+    prefer_horizontal=0.7,
+    margin=10,
+)
+
+# Title styling, shared by the matplotlib and native render modes
+TITLE_COLOR = '#333'
+TITLE_FONT_SIZE = 24  # pt, on the 20-inch-wide matplotlib figure
+
+# Defaults for the native render mode: cloud drawn at LAYOUT_PARAMS size x scale
+DEFAULT_SCALE = 2.0
+OUTPUT_FORMATS = ('png', 'webp')
+
+# Bump whenever preprocess_texts changes in a way that alters its output, so
+# cached results from the old pipeline are no longer used (they expire)
+PIPELINE_VERSION = 1
 
 # Initialize lemmatizer for English
 lemmatizer = WordNetLemmatizer()
@@ -68,98 +142,445 @@ def french_color_func(word, font_size, position, orientation, random_state=None,
     colors = ['#e74c3c', '#c0392b', '#e67e22', '#d35400', '#f39c12', '#f1c40f']
     return colors[stable_hash(word) % len(colors)]
 
-# Function to preprocess text
+@functools.cache
+def ensure_nltk_data(language):
+    """
+    Make sure the NLTK resources a language needs are available, downloading
+    any missing one into nlp_data_dir unless running offline.
+    """
+    if language not in NLTK_RESOURCES:
+        raise ValueError(f"Unsupported language: {language!r} (expected 'English' or 'French')")
+    for resource, package in NLTK_RESOURCES[language]:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if nlp_options['offline']:
+                raise LookupError(
+                    f"NLTK resource {package!r} not found in {nltk.data.path} and downloads are disabled; "
+                    f"copy it into {nlp_data_dir} or run once with network access"
+                ) from None
+            logging.info(f"Downloading NLTK {package!r} into {nlp_data_dir}...")
+            if not nltk.download(package, download_dir=nlp_data_dir, quiet=True):
+                raise LookupError(f"Could not download NLTK resource {package!r}") from None
+
+def spacy_model_source(name):
+    """A model directory under nlp_data_dir if present, else the installed package name."""
+    local_path = os.path.join(nlp_data_dir, name)
+    return local_path if os.path.isdir(local_path) else name
+
+def spacy_model_version(name):
+    """Version of a spaCy model, read from its metadata without loading it."""
+    source = spacy_model_source(name)
+    if source != name:
+        return spacy.util.get_model_meta(source).get('version', '')
+    return spacy.util.get_package_version(name) or ''
+
+@functools.cache
+@span('load spaCy model')
+def load_spacy_model(name):
+    """Load a spaCy model (without parser and NER) once, on first use."""
+    source = spacy_model_source(name)
+    logging.info(f"Loading spaCy model {source}...")
+    try:
+        return spacy.load(source, exclude=FRENCH_EXCLUDE)
+    except OSError as e:
+        raise OSError(
+            f"spaCy model {name!r} not found: install it with `python -m spacy download {name}` "
+            f"or place the model directory at {os.path.join(nlp_data_dir, name)}"
+        ) from e
+
+@functools.cache
+def stop_words(language):
+    """Combined NLTK/spaCy stop words plus exceptions, built once per language."""
+    ensure_nltk_data(language)
+    if language == 'English':
+        return frozenset(stopwords.words('english')).union(english_exceptions)
+    # spaCy's French stop words come with the language class, no model needed
+    spacy_stop_words = spacy.util.get_lang_class('fr').Defaults.stop_words
+    return frozenset(stopwords.words('french')).union(spacy_stop_words, french_exceptions)
+
+# Function to preprocess a batch of texts
+def preprocess_texts(texts, language, batch_size=DEFAULT_BATCH_SIZE, n_process=DEFAULT_N_PROCESS):
+    """
+    Yield the processed text for each input text, in order. French texts are
+    streamed through the spaCy model's pipe in batches of batch_size, across
+    n_process worker processes (-1 uses every CPU). The model (and the stop
+    words, with their NLTK data) are only loaded once there is a text to
+    process.
+    """
+    texts = ('' if text is None else text.lower() for text in texts)
+    first = next(texts, None)
+    if first is None:
+        return
+    texts = itertools.chain([first], texts)
+    all_stop_words = stop_words(language)
+
+    if language == 'English':
+        for text in texts:
+            tokens = word_tokenize(text)
+            yield ' '.join(
+                lemmatizer.lemmatize(word) for word in tokens if word.isalnum() and word not in all_stop_words
+            )
+    else:
+        nlp = load_spacy_model(nlp_options['french_model'])
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            # Check both the surface form and the lemma against the stop word list:
+            # a kept lemma can itself be a stop word (e.g. "était" -> "être").
+            yield ' '.join(
+                token.lemma_ for token in doc
+                if token.text.isalnum()
+                and token.text not in all_stop_words
+                and token.lemma_ not in all_stop_words
+            )
+
+# Function to preprocess a single text
 def preprocess_text(text, language):
     if text is None:
         return ""
+    return next(preprocess_texts([text], language))
 
-    if language == 'English':
-        tokens = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english')).union(english_exceptions)
-        processed_tokens = [lemmatizer.lemmatize(word) for word in tokens if word.isalnum() and word not in stop_words]
-    elif language == 'French':
-        nltk_stop_words = set(stopwords.words('french'))
-        spacy_stop_words = nlp_fr.Defaults.stop_words
-        all_stop_words = nltk_stop_words.union(spacy_stop_words).union(french_exceptions)
-        doc = nlp_fr(text.lower())
-        # Check both the surface form and the lemma against the stop word list:
-        # a kept lemma can itself be a stop word (e.g. "était" -> "être").
-        processed_tokens = [
-            token.lemma_ for token in doc
-            if token.text.isalnum()
-            and token.text not in all_stop_words
-            and token.lemma_ not in all_stop_words
-        ]
+def pipeline_fingerprint(language):
+    """
+    Hash of everything besides the text itself that determines the output of
+    preprocess_texts: pipeline version, model, stop words and exceptions.
+    """
+    if language == 'French':
+        french_model = nlp_options['french_model']
+        parts = [french_model, spacy_model_version(french_model), *FRENCH_EXCLUDE]
     else:
-        raise ValueError(f"Unsupported language: {language!r} (expected 'English' or 'French')")
+        parts = ['nltk', nltk.__version__]
+    parts = [str(PIPELINE_VERSION), language, *parts, *sorted(stop_words(language))]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
 
-    return ' '.join(processed_tokens)
+def open_preprocess_cache(path=preprocess_cache_path):
+    """
+    Open (and create if needed) the SQLite cache of preprocessed texts, and
+    drop entries not used for PREPROCESS_CACHE_MAX_AGE_DAYS.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != PREPROCESS_CACHE_SCHEMA:
+        conn.execute('DROP TABLE IF EXISTS preprocessed')
+        conn.execute(f'PRAGMA user_version = {PREPROCESS_CACHE_SCHEMA}')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS preprocessed ('
+        'fingerprint TEXT NOT NULL, text_hash TEXT NOT NULL, processed TEXT NOT NULL, used REAL NOT NULL, '
+        'PRIMARY KEY (fingerprint, text_hash)) WITHOUT ROWID'
+    )
+    conn.execute('DELETE FROM preprocessed WHERE used < ?', (time.time() - PREPROCESS_CACHE_MAX_AGE_DAYS * 86400,))
+    conn.commit()
+    return conn
 
-# Function to generate and save word cloud
-def generate_wordcloud(text, language):
-    logging.info(f"Generating {language} word cloud...")
+def preprocess_cached(texts, language, conn, batch_size=DEFAULT_BATCH_SIZE, n_process=DEFAULT_N_PROCESS):
+    """
+    Like preprocess_texts, but only runs the pipeline on texts missing from
+    the cache. Texts are handled CACHE_CHUNK_SIZE at a time, so results stream
+    out in order. Entries are keyed by (pipeline fingerprint, text hash), so
+    results of other pipelines (e.g. the --draft model) live side by side;
+    entries found are marked as used, which keeps them from expiring.
+    """
+    texts = iter(texts)
+    fingerprint = None
+    total = hits = 0
+    while chunk := ['' if text is None else text for text in itertools.islice(texts, CACHE_CHUNK_SIZE)]:
+        if fingerprint is None:
+            # Only once there are texts: it needs the stop words, so the NLTK data
+            fingerprint = pipeline_fingerprint(language)
+        keys = [hashlib.sha256(text.encode()).hexdigest() for text in chunk]
 
-    # Select color function based on language
-    color_func = english_color_func if language == 'English' else french_color_func
+        unique_keys = list(dict.fromkeys(keys))
+        cached = {}
+        for start in range(0, len(unique_keys), 500):
+            batch = unique_keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            cached.update(conn.execute(
+                'SELECT text_hash, processed FROM preprocessed '
+                f'WHERE fingerprint = ? AND text_hash IN ({placeholders})',
+                [fingerprint, *batch],
+            ))
+        now = time.time()
+        conn.executemany(
+            'UPDATE preprocessed SET used = ? WHERE fingerprint = ? AND text_hash = ?',
+            [(now, fingerprint, key) for key in cached],
+        )
+
+        missing = {key: text for key, text in zip(keys, chunk, strict=True) if key not in cached}
+        if missing:
+            with span(f'preprocess {language}'):
+                processed = preprocess_texts(missing.values(), language, batch_size=batch_size, n_process=n_process)
+                new_rows = dict(zip(missing, tqdm(processed, total=len(missing)), strict=True))
+            conn.executemany(
+                'INSERT OR REPLACE INTO preprocessed (fingerprint, text_hash, processed, used) VALUES (?, ?, ?, ?)',
+                [(fingerprint, key, value, now) for key, value in new_rows.items()],
+            )
+            cached.update(new_rows)
+        conn.commit()
+
+        total += len(chunk)
+        hits += len(chunk) - len(missing)
+        yield from (cached[key] for key in keys)
+
+    logging.info(f"{hits} of {total} {language} texts found in cache")
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally et al., 2005): keeps at most
+    `capacity` counters, so memory stays constant however many terms stream
+    through. Any term whose true count exceeds total / capacity is guaranteed
+    to be kept, and reported counts overestimate by at most that much.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        # Min-heap of (count, term), one entry per tracked term. Counts only
+        # grow, so stale entries are refreshed lazily when popped.
+        self._heap = []
+
+    def update(self, terms):
+        for term in terms:
+            if term in self.counts:
+                self.counts[term] += 1
+            elif len(self.counts) < self.capacity:
+                self.counts[term] = 1
+                heapq.heappush(self._heap, (1, term))
+            else:
+                while True:
+                    count, victim = heapq.heappop(self._heap)
+                    if self.counts[victim] == count:
+                        break
+                    heapq.heappush(self._heap, (self.counts[victim], victim))
+                del self.counts[victim]
+                self.counts[term] = count + 1
+                heapq.heappush(self._heap, (count + 1, term))
+
+    def most_common(self, n=None):
+        return Counter(self.counts).most_common(n)
+
+def keep_term(term):
+    """
+    Whether a preprocessed term is counted: all-digit terms and WordCloud's
+    own STOPWORDS are dropped. This is only the number and stop word filter
+    of WordCloud.generate; terms are not case-folded, merged with their
+    plurals or paired into collocations here, as they already come out of
+    preprocess_texts as lemmas of lower-cased text.
+    """
+    return not term.isdigit() and term not in STOPWORDS
 
-    # Create word cloud with improved settings
+def count_terms(processed_texts, sketch_size=None):
+    """
+    Count terms one processed text at a time and return the MAX_WORDS most
+    frequent as a {term: count} dict for WordCloud.generate_from_frequencies.
+    With sketch_size, counting uses a SpaceSaving sketch of that many counters
+    instead of an exact Counter, bounding memory on very large corpora.
+    """
+    counter = Counter() if not sketch_size else SpaceSaving(sketch_size)
+    for text in processed_texts:
+        counter.update(term for term in text.split() if keep_term(term))
+    return dict(counter.most_common(MAX_WORDS))
+
+def layout_cache_key(frequencies, font_path):
+    """Hash of the frequency table and every setting that affects placement."""
+    payload = json.dumps(
+        [wordcloud_module.__version__, font_path, LAYOUT_PARAMS, sorted(frequencies.items())],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_wordcloud(frequencies, color_func, background_color=None, use_cache=True):
+    """
+    Lay out a WordCloud for frequencies, reusing the cached placement (words,
+    font sizes, positions, orientations) when one exists for the same
+    frequencies and LAYOUT_PARAMS. Colors are always recomputed.
+    """
     wordcloud = WordCloud(
-        width=1600,
-        height=800,
-        background_color=None,
+        **LAYOUT_PARAMS,
+        background_color=background_color,
         mode="RGBA",
-        max_words=200,
-        min_font_size=10,
-        max_font_size=150,
-        relative_scaling=0.5,
-        prefer_horizontal=0.7,
         color_func=color_func,
-        margin=10,
         contour_width=0,
-        collocations=False  # Avoid repeated word pairs
-    ).generate(text)
-
-    # Create figure with modern styling
-    fig, ax = plt.subplots(figsize=(20, 10), dpi=300, facecolor='none')
-    ax.set_facecolor('none')
-
-    # Display word cloud
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-
-    # Add subtle title
-    lang_label = 'English Abstracts' if language == 'English' else 'French Abstracts'
-    ax.set_title(
-        lang_label,
-        fontsize=24,
-        fontweight='bold',
-        color='#333',
-        pad=20,
-        loc='center'
     )
+    layout_path = os.path.join(layout_cache_dir, f'{layout_cache_key(frequencies, wordcloud.font_path)}.json')
+
+    if use_cache and os.path.exists(layout_path):
+        logging.info(f"Reusing cached layout {os.path.basename(layout_path)}")
+        with open(layout_path, encoding='utf-8') as f:
+            layout = json.load(f)
+        wordcloud.layout_ = [
+            ((word, freq), font_size, tuple(position),
+             None if orientation is None else Image.Transpose(orientation), None)
+            for word, freq, font_size, position, orientation in layout
+        ]
+        return wordcloud.recolor(color_func=color_func)
+
+    wordcloud.generate_from_frequencies(frequencies)
+    if use_cache:
+        layout = [
+            [word, freq, int(font_size), [int(p) for p in position],
+             None if orientation is None else int(orientation)]
+            for (word, freq), font_size, position, orientation, _ in wordcloud.layout_
+        ]
+        os.makedirs(layout_cache_dir, exist_ok=True)
+        tmp_path = f'{layout_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(layout, f, ensure_ascii=False)
+        os.replace(tmp_path, layout_path)
+    return wordcloud
+
+def render_native(wordcloud, title, output_base, scale=DEFAULT_SCALE, formats=('png',), background_color=None):
+    """
+    Draw the word cloud directly at LAYOUT_PARAMS size x scale and composite
+    the title above it with Pillow, skipping the matplotlib figure. Writes one
+    optimized file per format ('png' and/or 'webp'); returns their paths.
+    """
+    wordcloud.scale = scale
+    cloud = wordcloud.to_image().convert('RGBA')
+    width = cloud.width
+
+    # Match the matplotlib title: 24 pt bold on a 20-inch-wide figure, 20 pt pad
+    font_size = round(width * TITLE_FONT_SIZE / (72 * 20))
+    pad = round(width * 20 / (72 * 20))
+    font_path = font_manager.findfont(font_manager.FontProperties(weight='bold'))
+    font = ImageFont.truetype(font_path, font_size)
+    title_height = font_size + 2 * pad
+
+    canvas = Image.new('RGBA', (width, cloud.height + title_height), background_color or (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).text((width / 2, pad), title, fill=TITLE_COLOR, font=font, anchor='mt')
+    canvas.alpha_composite(cloud, (0, title_height))
 
-    # Save with tight layout
-    output_path = os.path.join(wordclouds_dir, f'{language.lower()}_wordcloud.png')
-    plt.savefig(output_path, bbox_inches='tight', pad_inches=0.5, transparent=True, facecolor='none')
-    plt.close()
+    paths = []
+    for fmt in formats:
+        path = f'{output_base}.{fmt}'
+        if fmt == 'png':
+            canvas.save(path, format='PNG', optimize=True)
+        elif fmt == 'webp':
+            canvas.save(path, format='WEBP', quality=90, method=6)
+        else:
+            raise ValueError(f"Unsupported output format: {fmt!r} (expected one of {OUTPUT_FORMATS})")
+        paths.append(path)
+    return paths
+
+# Function to generate and save word cloud
+def generate_wordcloud(frequencies, language, title=None, background_color=None, use_cache=True,
+                       render='matplotlib', scale=DEFAULT_SCALE, formats=('png',)):
+    """
+    Lay out and save the word cloud for one language. render='matplotlib'
+    writes the 300 dpi figure PNG; render='native' uses render_native with
+    the given scale and formats.
+    """
+    logging.info(f"Generating {language} word cloud...")
+
+    # Select color function based on language
+    color_func = english_color_func if language == 'English' else french_color_func
+
+    with span('build figure'):
+        wordcloud = build_wordcloud(frequencies, color_func, background_color=background_color, use_cache=use_cache)
+
+    if title is None:
+        title = 'English Abstracts' if language == 'English' else 'French Abstracts'
+    output_base = os.path.join(wordclouds_dir, f'{language.lower()}_wordcloud')
+
+    if render == 'native':
+        with span('write output'):
+            output_paths = render_native(wordcloud, title, output_base, scale=scale, formats=formats,
+                                         background_color=background_color)
+        for output_path in output_paths:
+            logging.info(f"{language} word cloud saved as {output_path}")
+        return
+
+    with span('write output'):
+        # Create figure with modern styling
+        facecolor = background_color or 'none'
+        _fig, ax = plt.subplots(figsize=(20, 10), dpi=300, facecolor=facecolor)
+        ax.set_facecolor(facecolor)
+
+        # Display word cloud
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+
+        # Add subtle title
+        ax.set_title(
+            title,
+            fontsize=TITLE_FONT_SIZE,
+            fontweight='bold',
+            color=TITLE_COLOR,
+            pad=20,
+            loc='center'
+        )
+
+        # Save with tight layout
+        output_path = f'{output_base}.png'
+        plt.savefig(output_path, bbox_inches='tight', pad_inches=0.5,
+                    transparent=background_color is None, facecolor=facecolor)
+        plt.close()
     logging.info(f"{language} word cloud saved as {output_path}")
 
-# Preprocess and generate word cloud for English entries
-logging.info("Processing English entries...")
-english_entries = [item for item in data['rows'] if item['Language'] == 'English' and item['Abstract'] is not None]
-english_text = ' '.join([preprocess_text(item['Abstract'], 'English') for item in tqdm(english_entries)])
-if english_text.strip():
-    generate_wordcloud(english_text, 'English')
-else:
-    logging.warning("No English text found for word cloud generation")
-
-# Preprocess and generate word cloud for French entries
-logging.info("Processing French entries...")
-french_entries = [item for item in data['rows'] if item['Language'] == 'French' and item['Abstract'] is not None]
-french_text = ' '.join([preprocess_text(item['Abstract'], 'French') for item in tqdm(french_entries)])
-if french_text.strip():
-    generate_wordcloud(french_text, 'French')
-else:
-    logging.warning("No French text found for word cloud generation")
-
-logging.info("Word clouds generated successfully!")
+def main():
+    parser = argparse.ArgumentParser(description='Generate the English and French abstract word clouds.')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'abstracts per nlp.pipe batch (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--n-process', type=int, default=DEFAULT_N_PROCESS,
+                        help='worker processes for the French spaCy pipeline, -1 for all CPUs '
+                             f'(default: {DEFAULT_N_PROCESS})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore the preprocessed-abstract and layout caches and recompute everything')
+    parser.add_argument('--sketch-size', type=int, default=0,
+                        help='count terms with a constant-memory Space-Saving sketch of this many counters '
+                             f'(e.g. {10 * MAX_WORDS}) instead of exactly (default: exact)')
+    parser.add_argument('--render', choices=('matplotlib', 'native'), default='matplotlib',
+                        help='matplotlib: 300 dpi figure PNG; native: draw the cloud directly at the target '
+                             'size with Pillow (default: matplotlib)')
+    parser.add_argument('--scale', type=float, default=DEFAULT_SCALE,
+                        help=f'native mode: output size as a multiple of {LAYOUT_PARAMS["width"]}x'
+                             f'{LAYOUT_PARAMS["height"]} (default: {DEFAULT_SCALE})')
+    parser.add_argument('--format', dest='formats', nargs='+', choices=OUTPUT_FORMATS, default=['png'],
+                        help='native mode: output formats (default: png)')
+    parser.add_argument('--draft', action='store_true',
+                        help=f'use the small {FRENCH_MODELS["draft"]} model for a fast draft build')
+    parser.add_argument('--offline', action='store_true',
+                        help=f'never download NLTK data; resources must already be in {nlp_data_dir}')
+    args = parser.parse_args()
+    if args.draft:
+        nlp_options['french_model'] = FRENCH_MODELS['draft']
+    if args.offline:
+        nlp_options['offline'] = True
+
+    with span('load'):
+        # Read the JSON file
+        logging.info("Reading JSON file...")
+        json_path = os.path.join(data_dir, 'Publications_and_activities_data.json')
+        try:
+            with open(json_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except UnicodeDecodeError:
+            logging.warning("UTF-8 encoding failed, trying ISO-8859-1...")
+            with open(json_path, 'r', encoding='iso-8859-1') as file:
+                data = json.load(file)
+
+    cache = None if args.no_cache else open_preprocess_cache()
+
+    # Preprocess and generate a word cloud for each language
+    for language in ('English', 'French'):
+        logging.info(f"Processing {language} entries...")
+        abstracts = (item['Abstract'] for item in data['rows']
+                     if item['Language'] == language and item['Abstract'] is not None)
+        pipe_options = dict(batch_size=args.batch_size, n_process=args.n_process)
+        if cache is None:
+            processed = tqdm(preprocess_texts(abstracts, language, **pipe_options))
+        else:
+            processed = preprocess_cached(abstracts, language, cache, **pipe_options)
+        with span('aggregate'):
+            frequencies = count_terms(processed, sketch_size=args.sketch_size)
+        if frequencies:
+            generate_wordcloud(frequencies, language, use_cache=not args.no_cache,
+                               render=args.render, scale=args.scale, formats=args.formats)
+        else:
+            logging.warning(f"No {language} text found for word cloud generation")
+
+    if cache is not None:
+        cache.close()
+    logging.info("Word clouds generated successfully!")
+
+
+if __name__ == '__main__':
+    main()
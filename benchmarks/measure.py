@@ -0,0 +1,50 @@
+"""
+Run one figure script with its stage spans recorded, and write the result
+as JSON. Used by run_benchmarks.py, which starts one process per
+measurement so runs don't share memory or imports:
+
+    python benchmarks/measure.py TREE_ROOT SCRIPT OUTPUT_JSON [--memory]
+
+With --memory, tracemalloc is on and each stage records its peak
+allocation. That slows the run down, so timings come from a separate run
+without it.
+"""
+
+import argparse
+import json
+import resource
+import runpy
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+parser = argparse.ArgumentParser()
+parser.add_argument('tree_root', type=Path)
+parser.add_argument('script', type=Path)
+parser.add_argument('output', type=Path)
+parser.add_argument('--memory', action='store_true')
+args = parser.parse_args()
+
+# Use the tree's copy of viz_common, the same module the script will import
+sys.path.insert(0, str(args.tree_root))
+import viz_common
+
+records = []
+viz_common.add_span_listener(records.append)
+
+if args.memory:
+    tracemalloc.start()
+
+sys.argv = [str(args.script)]
+sys.path.insert(0, str(args.script.parent))
+start = time.perf_counter()
+runpy.run_path(str(args.script), run_name='__main__')
+total_s = time.perf_counter() - start
+
+with open(args.output, 'w', encoding='utf-8') as f:
+    json.dump({
+        'total_s': total_s,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'spans': records,
+    }, f)
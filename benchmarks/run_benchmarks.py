@@ -0,0 +1,180 @@
+"""
+Scaling benchmarks for the figure pipelines.
+
+For each scale factor, builds a scratch copy of the repository with
+synthetic datasets (see synthetic.py), then runs every figure script in a
+fresh process and records per-stage wall time (load, aggregate, build
+figure, write output) and, in a second run under tracemalloc, per-stage
+peak memory. Results are written to benchmarks/results/ as one JSON file per
+run, named by date and commit, and compared against the previous file so
+regressions show up between commits:
+
+    python benchmarks/run_benchmarks.py                        # 10x, 100x, 1000x
+    python benchmarks/run_benchmarks.py --scales 10 --figures treemap timeline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+from synthetic import DATASETS, write_datasets
+
+from remoboko.build import BUILDERS, SHARED_INPUTS
+
+RESULTS_DIR = BENCHMARKS_DIR / 'results'
+
+
+def prepare_tree(root, scale, seed):
+    """Copy the scripts and static inputs under root and write synthetic data at the given scale."""
+    files = set(SHARED_INPUTS)
+    for builder in BUILDERS.values():
+        files.add(builder['script'])
+        files.update(path for path in builder['inputs'] if path not in DATASETS)
+    for relative_path in files:
+        destination = root / relative_path
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(REPO_ROOT / relative_path, destination)
+    write_datasets(root, scale, seed)
+
+
+def measure(root, name, memory, timeout):
+    """Run one builder in a subprocess; returns the measure.py result, or None on failure."""
+    script = root / BUILDERS[name]['script']
+    output = root / f'.{name}.measure.json'
+    command = [sys.executable, str(BENCHMARKS_DIR / 'measure.py'), str(root), str(script), str(output)]
+    if memory:
+        command.append('--memory')
+    env = {**os.environ, 'MPLBACKEND': 'Agg'}
+    try:
+        # A failing figure is reported, not raised: the other figures still run
+        completed = subprocess.run(command, env=env, timeout=timeout, capture_output=True, text=True, check=False)
+    except subprocess.TimeoutExpired:
+        return None, f'timed out after {timeout}s'
+    if completed.returncode != 0:
+        last_line = (completed.stderr.strip().splitlines() or ['no output'])[-1]
+        return None, last_line
+    with open(output, encoding='utf-8') as f:
+        return json.load(f), None
+
+
+def summarize_stages(spans):
+    """Total wall time and max peak memory per stage name."""
+    stages = {}
+    for record in spans:
+        stage = stages.setdefault(record['name'], {'wall_s': 0.0, 'peak_bytes': None})
+        stage['wall_s'] += record['wall_s']
+        if record['peak_bytes'] is not None:
+            stage['peak_bytes'] = max(stage['peak_bytes'] or 0, record['peak_bytes'])
+    return stages
+
+
+def git_revision():
+    def git(*args):
+        # Outside a git checkout git fails with empty stdout, hence 'unknown'
+        completed = subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True, check=False)
+        return completed.stdout.strip() if completed.returncode == 0 else ''
+    return git('rev-parse', '--short', 'HEAD') or 'unknown', bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def compare(previous, current, threshold):
+    """Print stage timings that got slower than threshold x the previous run."""
+    def index(run):
+        return {
+            (result['figure'], result['scale'], stage): values['wall_s']
+            for result in run['results']
+            for stage, values in result.get('stages', {}).items()
+        }
+
+    before, after = index(previous), index(current)
+    regressions = []
+    for key, seconds in sorted(after.items()):
+        # Ignore sub-50 ms stages: too noisy to compare
+        if key in before and seconds > 0.05 and seconds > threshold * before[key]:
+            regressions.append((key, before[key], seconds))
+
+    print(f"\nCompared with {previous['commit']} ({previous['timestamp']}):")
+    if not regressions:
+        print(f"  no stage slower than {threshold:.2f}x")
+    for (figure, scale, stage), old, new in regressions:
+        print(f"  REGRESSION {figure} {scale}x {stage}: {old:.2f}s -> {new:.2f}s ({new / old:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the figure pipelines on synthetic data.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000],
+                        help='dataset size multipliers (default: 10 100 1000)')
+    parser.add_argument('--figures', nargs='+', choices=list(BUILDERS), default=list(BUILDERS),
+                        metavar='NAME', help='builders to benchmark (default: all)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc memory pass')
+    parser.add_argument('--timeout', type=int, default=1800, help='per-run timeout in seconds (default: 1800)')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic data seed (default: 0)')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='flag stages slower than this ratio vs the previous results (default: 1.25)')
+    args = parser.parse_args()
+
+    commit, dirty = git_revision()
+    run = {
+        'commit': commit + ('-dirty' if dirty else ''),
+        'timestamp': datetime.now(UTC).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': [],
+    }
+
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(prefix=f'remoboko-bench-{scale}x-') as tmp:
+            root = Path(tmp)
+            prepare_tree(root, scale, args.seed)
+            for name in args.figures:
+                result = {'figure': name, 'scale': scale}
+                timing, error = measure(root, name, memory=False, timeout=args.timeout)
+                if timing is None:
+                    result['error'] = error
+                    print(f"{name:24} {scale:>5}x  FAILED: {error}")
+                    run['results'].append(result)
+                    continue
+
+                result['total_s'] = timing['total_s']
+                result['max_rss_kb'] = timing['max_rss_kb']
+                result['stages'] = summarize_stages(timing['spans'])
+                if not args.no_memory:
+                    memory, error = measure(root, name, memory=True, timeout=args.timeout)
+                    if memory is not None:
+                        for stage, values in summarize_stages(memory['spans']).items():
+                            result['stages'].setdefault(stage, {'wall_s': None})['peak_bytes'] = values['peak_bytes']
+                run['results'].append(result)
+
+                stages = '  '.join(
+                    f"{stage} {values['wall_s']:.2f}s"
+                    + (f"/{values['peak_bytes'] / 2**20:.0f}MB" if values.get('peak_bytes') is not None else '')
+                    for stage, values in result['stages'].items() if values['wall_s'] is not None
+                )
+                print(f"{name:24} {scale:>5}x  {result['total_s']:7.2f}s  {stages}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    previous_files = sorted(RESULTS_DIR.glob('*.json'))
+    stamp = datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')
+    output_path = RESULTS_DIR / f'{stamp}_{run["commit"]}.json'
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    if previous_files:
+        with open(previous_files[-1], encoding='utf-8') as f:
+            compare(json.load(f), run, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Synthetic, scaled-up versions of the project's datasets for benchmarking.
+
+Rows are resampled from the real data, so Type/Language/Country mixes and
+text lengths stay realistic, then given fresh dates, names and jittered
+coordinates. Abstracts are rebuilt from each language's real vocabulary, and
+entity pools (authors, affiliations) grow with the scale factor.
+
+    python benchmarks/synthetic.py OUTPUT_DIR --scale 100
+
+writes the datasets under OUTPUT_DIR at their usual repository paths.
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from viz_common import load_json
+
+
+def _random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _jitter(rng, value, spread):
+    return value + rng.uniform(-spread, spread)
+
+
+def publications(real, scale, rng):
+    """Publications_and_activities_data.json with len(rows) * scale rows."""
+    rows = real['rows']
+    dates = [date.fromisoformat(row['Date']) for row in rows if row['Date']]
+    start, end = min(dates), max(dates)
+
+    vocabulary = {}
+    for row in rows:
+        if row['Abstract']:
+            vocabulary.setdefault(row['Language'], []).extend(row['Abstract'].split())
+
+    real_authors = sorted({name for row in rows if row['Author(s)'] for name in row['Author(s)'].split('|')})
+    authors = real_authors + [f'Author {i}' for i in range(len(real_authors) * (scale - 1))]
+
+    synthetic = []
+    for i in range(len(rows) * scale):
+        template = rng.choice(rows)
+        abstract = template['Abstract']
+        if abstract:
+            abstract = ' '.join(rng.choices(vocabulary[template['Language']], k=len(abstract.split())))
+        author_list = template['Author(s)']
+        if author_list:
+            author_list = '|'.join(rng.sample(authors, len(author_list.split('|'))))
+        synthetic.append({
+            'Title': f"{template['Title']} ({i})",
+            'Type': template['Type'],
+            'Author(s)': author_list,
+            'Date': _random_date(rng, start, end).isoformat(),
+            'Language': template['Language'],
+            'Abstract': abstract,
+        })
+    return {'rows': synthetic}
+
+
+def collaborators(real, scale, rng):
+    """Collaborators_data.json with len(real) * scale rows over scale x as many affiliations."""
+    affiliations = {}
+    for row in real:
+        affiliations.setdefault(row['Affiliation'], (row['Country'], row['Coordinate location']))
+    pool = [(name, country, coords) for name, (country, coords) in affiliations.items()]
+    for name, country, coords in list(pool):
+        lat, lng = (float(c) for c in coords.split(','))
+        for k in range(1, scale):
+            pool.append((
+                f'{name} (site {k})',
+                country,
+                f'{_jitter(rng, lat, 0.5):.8f},{_jitter(rng, lng, 0.5):.8f}',
+            ))
+
+    synthetic = []
+    for i in range(len(real) * scale):
+        template = rng.choice(real)
+        affiliation, country, coords = rng.choice(pool)
+        synthetic.append({
+            'Collaborator': f'Collaborator {i}',
+            'Gender': template['Gender'],
+            'Affiliation': affiliation,
+            'Country': country,
+            'Coordinate location': coords,
+            'URL': f'https://remoboko.hypotheses.org/tag/collaborator-{i}',
+        })
+    return synthetic
+
+
+def locations(real, scale, rng):
+    """locations.json (GeoJSON) with scale x as many point features."""
+    features = []
+    for i in range(len(real['features']) * scale):
+        template = rng.choice(real['features'])
+        lng, lat = template['geometry']['coordinates']
+        features.append({
+            'type': 'Feature',
+            'properties': {**template['properties'], 'name': f"{template['properties']['name']} ({i})"},
+            'geometry': {'type': 'Point', 'coordinates': [_jitter(rng, lng, 0.05), _jitter(rng, lat, 0.05)]},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def timeline_events(real, scale, rng):
+    """Timeline data.json with scale x as many events, without hand-tuned layout fields."""
+    start, end = date(1960, 1, 1), date(2023, 12, 31)
+    events = []
+    for i in range(len(real) * scale):
+        template = rng.choice(real)
+        events.append({
+            'country': template['country'],
+            'event': f"{template['event']} ({i})",
+            'date': _random_date(rng, start, end).isoformat(),
+            'category': template['category'],
+        })
+    return events
+
+
+# Dataset path (relative to the repository root) -> generator
+DATASETS = {
+    'Final report/Data/Publications_and_activities_data.json': publications,
+    'Final report/Data/Collaborators_data.json': collaborators,
+    'Book_DeGruyter/Maps/locations.json': locations,
+    'Book_DeGruyter/Timeline/data.json': timeline_events,
+}
+
+
+def write_datasets(root, scale, seed=0):
+    """Write every synthetic dataset under root, at its repository-relative path."""
+    rng = random.Random(seed)
+    for relative_path, generate in DATASETS.items():
+        data = generate(load_json(REPO_ROOT / relative_path), scale, rng)
+        path = Path(root) / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write synthetic scaled-up copies of the datasets.')
+    parser.add_argument('output_dir', type=Path)
+    parser.add_argument('--scale', type=int, default=10, help='size multiplier (default: 10)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = parser.parse_args()
+    write_datasets(args.output_dir, args.scale, args.seed)
+    print(f"Synthetic datasets at {args.scale}x written under {args.output_dir}")
@@ -0,0 +1,6 @@
+"""
+Build tooling for the Remoboko visualizations.
+
+The figure scripts under Book_DeGruyter/ and Final report/ stay runnable on
+their own; this package drives them together (see `python -m remoboko build`).
+"""
@@ -0,0 +1,32 @@
+"""
+Command-line entry point:
+
+    python -m remoboko build [NAME ...] [--force] [--jobs N] [--exclude NAME ...]
+    python -m remoboko build --list
+    python -m remoboko tiles {extract,export,serve} ...
+"""
+
+import argparse
+import sys
+
+from remoboko import build, tiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m remoboko', description='Remoboko build tools.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='regenerate figures whose inputs changed')
+    build.add_arguments(build_parser)
+    build_parser.set_defaults(func=build.main)
+
+    tiles_parser = subparsers.add_parser('tiles', help='extract, export and serve local basemap tiles')
+    tiles.add_arguments(tiles_parser)
+    tiles_parser.set_defaults(func=tiles.main)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
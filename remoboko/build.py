@@ -0,0 +1,341 @@
+"""
+Single-process build of every figure, with make-style skipping.
+
+Each builder is one of the existing figure scripts, run in this interpreter
+via runpy, so pandas/plotly/folium are imported once and viz_common's
+parsed-table memo is shared between scripts. A builder is skipped when the
+hashes of its script, viz_common.py and input files match the last
+successful build and its outputs are still exactly as that build left them.
+
+Builders whose inputs include another builder's outputs run after it: the
+selected builders are run in dependency waves, and each builder's inputs
+are hashed just before it runs, so it sees (and records) what the earlier
+waves wrote.
+"""
+
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Hashes of the last successful build of each builder
+STATE_PATH = REPO_ROOT / '.cache' / 'build_state.json'
+
+# Files every builder depends on besides its own script and inputs
+SHARED_INPUTS = ['viz_common.py']
+
+# What a figure script fails with on missing or malformed data, files, models
+# or libraries (a missing NLTK resource is a LookupError): reported as that
+# builder failing, while the others go on. Anything else stops the build.
+BUILDER_ERRORS = (
+    OSError, ImportError, LookupError, ValueError, TypeError, AttributeError, ArithmeticError, RuntimeError,
+)
+
+# Figure builders: script, data inputs and generated outputs (or glob patterns
+# of them), relative to the repository root. Names are what `python -m remoboko build NAME` selects; a
+# group name (a builder's optional 'group') selects every builder in it, e.g.
+# `--exclude nlp`.
+BUILDERS = {
+    'map_locations': {
+        'script': 'Book_DeGruyter/Maps/map_locations.py',
+        'inputs': ['Book_DeGruyter/Maps/locations.json'],
+        'outputs': ['Book_DeGruyter/Maps/UAC_UL_locations_map.html'],
+    },
+    'map_universities': {
+        'script': 'Book_DeGruyter/Maps/map_universities.py',
+        'inputs': [
+            'Book_DeGruyter/Maps/University_Lome.jpg',
+            'Book_DeGruyter/Maps/University_Abomey-Calavi.jpg',
+            'Book_DeGruyter/Maps/University_Kara.jpg',
+            'Book_DeGruyter/Maps/University_Parakou.jpg',
+        ],
+        'outputs': ['Book_DeGruyter/Maps/universities_map.html'],
+    },
+    # Label lanes for both timeline renderers (timeline.py and script.js)
+    'timeline_layout': {
+        'script': 'Book_DeGruyter/Timeline/timeline_layout.py',
+        'inputs': ['Book_DeGruyter/Timeline/data.json'],
+        'outputs': ['Book_DeGruyter/Timeline/data.layout.json'],
+    },
+    'timeline': {
+        'script': 'Book_DeGruyter/Timeline/timeline.py',
+        'inputs': [
+            'Book_DeGruyter/Timeline/timeline_layout.py',
+            'Book_DeGruyter/Timeline/data.json',
+            'Book_DeGruyter/Timeline/data.layout.json',
+        ],
+        # NAME.png/svg, or NAME_<page>.png/svg for timelines laid out on several pages
+        'outputs': [
+            'Book_DeGruyter/Timeline/Religion_Timeline*.png',
+            'Book_DeGruyter/Timeline/Religion_Timeline*.svg',
+            'Book_DeGruyter/Timeline/Education_Politics_Timeline*.png',
+            'Book_DeGruyter/Timeline/Education_Politics_Timeline*.svg',
+        ],
+    },
+    'collaborators_country': {
+        'script': 'Final report/collaborators_country.py',
+        'inputs': ['Final report/Data/Collaborators_data.json'],
+        'outputs': ['Final report/collaborators_by_country.html', 'Final report/collaborators_by_country.spec.json'],
+    },
+    'collaborators_gender': {
+        'script': 'Final report/collaborators_gender.py',
+        'inputs': ['Final report/Data/Collaborators_data.json'],
+        'outputs': ['Final report/collaborators_gender.png', 'Final report/collaborators_gender_white.png'],
+    },
+    'collaborators_map': {
+        'script': 'Final report/collaborators_map.py',
+        'inputs': ['Final report/Data/Collaborators_data.json'],
+        'outputs': ['Final report/collaborators_map.html'],
+    },
+    'treemap': {
+        'script': 'Final report/treemap.py',
+        'inputs': ['Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/treemap_chart.html', 'Final report/treemap_chart.spec.json'],
+    },
+    'activities_type_time': {
+        'script': 'Final report/activities_type_time.py',
+        'inputs': ['Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/activities_type_over_time.html', 'Final report/activities_type_over_time.spec.json'],
+    },
+    'coauthorship_network': {
+        'script': 'Final report/coauthorship_network.py',
+        'inputs': ['Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/coauthorship_network.html', 'Final report/coauthorship_network.spec.json'],
+    },
+    # The 'nlp' builders need the NLTK data and spaCy models (see README)
+    'word_clouds': {
+        'group': 'nlp',
+        'script': 'Final report/word_clouds.py',
+        'inputs': ['Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/WordClouds/english_wordcloud.png', 'Final report/WordClouds/french_wordcloud.png'],
+    },
+    # Tokenizes and lemmatizes with word_clouds.py, sharing its cache
+    'search_index': {
+        'group': 'nlp',
+        'script': 'Final report/search_index.py',
+        'inputs': ['Final report/word_clouds.py', 'Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/search/index.js', 'Final report/search/index.html'],
+    },
+    'term_trends': {
+        'group': 'nlp',
+        'script': 'Final report/term_trends.py',
+        'inputs': ['Final report/word_clouds.py', 'Final report/Data/Publications_and_activities_data.json'],
+        'outputs': ['Final report/term_trends.html', 'Final report/term_trends.spec.json'],
+    },
+    # Embeds the other builders' outputs (the Plotly charts through their
+    # figure specs), so it comes after them
+    'report_dashboard': {
+        'script': 'Final report/report_dashboard.py',
+        'inputs': [
+            'Final report/treemap_chart.spec.json',
+            'Final report/activities_type_over_time.spec.json',
+            'Final report/collaborators_by_country.spec.json',
+            'Final report/coauthorship_network.spec.json',
+            'Final report/term_trends.spec.json',
+            'Final report/collaborators_map.html',
+            'Final report/collaborators_gender_white.png',
+            'Final report/WordClouds/english_wordcloud.png',
+            'Final report/WordClouds/french_wordcloud.png',
+        ],
+        # One dashboard/<chart>.js per chart that has been built: term_trends
+        # is left out under --exclude nlp
+        'outputs': ['Final report/report_dashboard.html', 'Final report/dashboard/*.js'],
+    },
+}
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def input_hashes(name):
+    """Hashes of everything a builder reads: its script, shared modules and data."""
+    builder = BUILDERS[name]
+    paths = [builder['script'], *SHARED_INPUTS, *builder['inputs']]
+    return {path: file_hash(REPO_ROOT / path) for path in paths}
+
+
+def output_hashes(name):
+    """Hashes of a builder's outputs; a glob pattern stands for every file it matches (None if none)."""
+    hashes = {}
+    for pattern in BUILDERS[name]['outputs']:
+        paths = sorted(REPO_ROOT.glob(pattern)) if any(char in pattern for char in '*?[') else []
+        if not paths:
+            hashes[pattern] = file_hash(REPO_ROOT / pattern)
+        for path in paths:
+            hashes[path.relative_to(REPO_ROOT).as_posix()] = file_hash(path)
+    return hashes
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_name(f'{STATE_PATH.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def is_up_to_date(name, state):
+    """True if inputs match the last successful build and its outputs are untouched."""
+    previous = state.get(name)
+    if previous is None or previous['inputs'] != input_hashes(name):
+        return False
+    outputs = output_hashes(name)
+    return None not in outputs.values() and outputs == previous['outputs']
+
+
+def dependency_waves(names):
+    """
+    Split builders into waves to run in order: a builder comes after every
+    builder in `names` that produces one of its inputs. Returns (waves, the
+    producers each builder depends on). Raises ValueError on a cycle.
+    """
+    producers = {path: name for name in names for path in BUILDERS[name]['outputs']}
+    depends_on = {
+        name: {producers[path] for path in BUILDERS[name]['inputs'] if path in producers} - {name}
+        for name in names
+    }
+    waves, done, remaining = [], set(), list(names)
+    while remaining:
+        wave = [name for name in remaining if depends_on[name] <= done]
+        if not wave:
+            raise ValueError(f"Dependency cycle between builders: {', '.join(remaining)}")
+        waves.append(wave)
+        done.update(wave)
+        remaining = [name for name in remaining if name not in done]
+    return waves, depends_on
+
+
+def run_builder(name):
+    """
+    Run one builder script in this interpreter, as if invoked directly.
+    Returns (name, input hashes taken just before running, seconds, error
+    message or None).
+    """
+    from viz_common import span
+
+    inputs = input_hashes(name)
+    script = REPO_ROOT / BUILDERS[name]['script']
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [str(script)]
+    sys.path.insert(0, str(script.parent))
+    start = time.perf_counter()
+    error = None
+    try:
+        with span(name):
+            runpy.run_path(str(script), run_name='__main__')
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = str(e.code)
+    except BUILDER_ERRORS as e:
+        traceback.print_exc()
+        error = f'{type(e).__name__}: {e}'
+    finally:
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        if 'matplotlib.pyplot' in sys.modules:
+            sys.modules['matplotlib.pyplot'].close('all')
+    return name, inputs, time.perf_counter() - start, error
+
+
+def expand_groups(names):
+    """Builder names, with each group name replaced by the builders in it."""
+    groups = {}
+    for name, builder in BUILDERS.items():
+        if 'group' in builder:
+            groups.setdefault(builder['group'], []).append(name)
+    return [member for name in names for member in groups.get(name, [name])]
+
+
+def add_arguments(parser):
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='builders or groups to run (default: all); see --list')
+    parser.add_argument('--exclude', nargs='+', default=[], metavar='NAME',
+                        help='builders or groups to leave out')
+    parser.add_argument('--force', action='store_true', help='rebuild even if inputs are unchanged')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='run builders in a pool of this many processes (default: 1, in-process; '
+                             'REMOBOKO_TRACE tracing only covers in-process builds)')
+    parser.add_argument('--list', action='store_true', help='list builders and whether they are up to date')
+
+
+def main(args):
+    names, exclude = expand_groups(args.names), expand_groups(args.exclude)
+    unknown = sorted(set(names + exclude) - set(BUILDERS))
+    if unknown:
+        groups = sorted({builder['group'] for builder in BUILDERS.values() if 'group' in builder})
+        print(f"Unknown builder(s): {', '.join(unknown)}. Available: {', '.join(BUILDERS)}; "
+              f"groups: {', '.join(groups)}", file=sys.stderr)
+        return 2
+
+    # Figures are written to files; never open interactive windows
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    sys.path.insert(0, str(REPO_ROOT))
+
+    state = load_state()
+    selected = [name for name in (names or BUILDERS) if name not in exclude]
+
+    if args.list:
+        for name, builder in BUILDERS.items():
+            status = 'up to date' if is_up_to_date(name, state) else 'stale'
+            print(f"{name:24} {status:12} {builder.get('group', ''):6} {builder['script']}")
+        return 0
+
+    try:
+        waves, depends_on = dependency_waves(selected)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    failed = []
+    pool = ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+    try:
+        for wave in waves:
+            pending = []
+            for name in wave:
+                failed_producers = sorted(depends_on[name] & set(failed))
+                if failed_producers:
+                    print(f"[build] {name}: SKIPPED ({', '.join(failed_producers)} failed)", file=sys.stderr)
+                    failed.append(name)
+                elif not args.force and is_up_to_date(name, state):
+                    print(f"[build] {name}: up to date")
+                else:
+                    pending.append(name)
+
+            if pool is not None and len(pending) > 1:
+                results = list(pool.map(run_builder, pending))
+            else:
+                results = [run_builder(name) for name in pending]
+
+            for name, inputs, seconds, error in results:
+                if error is None:
+                    print(f"[build] {name}: built in {seconds:.1f}s")
+                    state[name] = {'inputs': inputs, 'outputs': output_hashes(name)}
+                else:
+                    print(f"[build] {name}: FAILED after {seconds:.1f}s ({error})", file=sys.stderr)
+                    failed.append(name)
+            save_state(state)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return 1 if failed else 0
@@ -0,0 +1,307 @@
+"""
+Local basemap tiles from MBTiles (SQLite) raster tile files.
+
+    python -m remoboko tiles extract SOURCE OUTPUT.mbtiles --points Book_DeGruyter/Maps/locations.json --zoom 5 14
+    python -m remoboko tiles export OUTPUT.mbtiles Book_DeGruyter/Maps/tiles
+    python -m remoboko tiles serve OUTPUT.mbtiles --port 8765
+
+`extract` copies just the tile pyramid covering the bounding box of a
+dataset's points, for the given zoom levels, from a larger MBTiles file or
+from a tile server URL template (whose terms must allow bulk download).
+The result can be exported as a z/x/y tile directory next to a map's HTML,
+or served locally; either way, point a map at it with --basemap (see
+viz_common.create_base_map), e.g. --basemap 'tiles/{z}/{x}/{y}.png' or
+--basemap 'http://localhost:8765/{z}/{x}/{y}.png'.
+"""
+
+import json
+import math
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# MBTiles 'format' metadata -> Content-Type
+TILE_MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+# Web Mercator's latitude limit
+MAX_LATITUDE = 85.0511287798
+
+
+def tile_xy(lat, lng, zoom):
+    """XYZ (slippy map) column and row of the tile containing a point."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 2 ** zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tms_row(y, zoom):
+    """MBTiles stores rows bottom-up (TMS); XYZ counts them top-down."""
+    return 2 ** zoom - 1 - y
+
+
+def points_bbox(paths, padding=0.1):
+    """
+    Bounding box (west, south, east, north) of the points in JSON datasets:
+    GeoJSON FeatureCollections of Points, or lists of records with a
+    'lat,lng' 'Coordinate location'. Padded by a fraction of its size.
+    """
+    lats, lngs = [], []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('type') == 'FeatureCollection':
+            for feature in data['features']:
+                if feature['geometry']['type'] == 'Point':
+                    lng, lat = feature['geometry']['coordinates'][:2]
+                    lats.append(lat)
+                    lngs.append(lng)
+        else:
+            for record in data:
+                try:
+                    lat, lng = (float(c) for c in record['Coordinate location'].split(','))
+                except (KeyError, ValueError, AttributeError):
+                    continue
+                lats.append(lat)
+                lngs.append(lng)
+    if not lats:
+        raise ValueError(f"No points found in {', '.join(map(str, paths))}")
+
+    pad_lat = (max(lats) - min(lats)) * padding
+    pad_lng = (max(lngs) - min(lngs)) * padding
+    return (
+        max(min(lngs) - pad_lng, -180.0),
+        max(min(lats) - pad_lat, -MAX_LATITUDE),
+        min(max(lngs) + pad_lng, 180.0),
+        min(max(lats) + pad_lat, MAX_LATITUDE),
+    )
+
+
+def tile_range(bbox, zoom):
+    """Inclusive XYZ column and row ranges of the tiles intersecting bbox at zoom."""
+    west, south, east, north = bbox
+    x_min, y_min = tile_xy(north, west, zoom)
+    x_max, y_max = tile_xy(south, east, zoom)
+    return range(x_min, x_max + 1), range(y_min, y_max + 1)
+
+
+def count_tiles(bbox, min_zoom, max_zoom):
+    return sum(len(xs) * len(ys) for xs, ys in (tile_range(bbox, z) for z in range(min_zoom, max_zoom + 1)))
+
+
+def bbox_tiles(bbox, min_zoom, max_zoom):
+    """Every (z, x, y) XYZ tile intersecting bbox, for zooms min_zoom..max_zoom."""
+    for zoom in range(min_zoom, max_zoom + 1):
+        xs, ys = tile_range(bbox, zoom)
+        for x in xs:
+            for y in ys:
+                yield zoom, x, y
+
+
+def create_mbtiles(path, metadata):
+    """A new, empty MBTiles file with the given metadata."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+    """)
+    conn.executemany('INSERT INTO metadata VALUES (?, ?)', [(k, str(v)) for k, v in metadata.items()])
+    return conn
+
+
+def read_metadata(conn):
+    return dict(conn.execute('SELECT name, value FROM metadata'))
+
+
+def open_mbtiles(path):
+    """Read-only connection to an existing MBTiles file."""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"MBTiles file not found: {path}")
+    return sqlite3.connect(f'file:{Path(path).resolve()}?mode=ro', uri=True)
+
+
+def fetch_tile(url_template, zoom, x, y, retries=3):
+    """Download one tile from an XYZ URL template; None if the server has no tile."""
+    url = url_template.replace('{s}', 'a').replace('{z}', str(zoom)).replace('{x}', str(x)).replace('{y}', str(y))
+    request = urllib.request.Request(url, headers={'User-Agent': 'remoboko-tiles (basemap extract)'})
+    for attempt in range(retries):
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            if attempt == retries - 1:
+                raise
+        except urllib.error.URLError:
+            if attempt == retries - 1:
+                raise
+        time.sleep(2 ** attempt)
+
+
+def extract(args):
+    bbox = points_bbox(args.points, args.padding)
+    min_zoom, max_zoom = args.zoom
+    total = count_tiles(bbox, min_zoom, max_zoom)
+    if total > args.max_tiles:
+        print(f"{total} tiles needed (more than --max-tiles {args.max_tiles}); "
+              f"narrow the zoom range or raise the limit", file=sys.stderr)
+        return 2
+
+    from_url = '{z}' in args.source
+    source = None if from_url else open_mbtiles(args.source)
+    metadata = {} if from_url else read_metadata(source)
+    metadata.update({
+        'name': metadata.get('name', Path(args.output).stem),
+        'format': metadata.get('format', Path(args.source).suffix.lstrip('.') if from_url else 'png') or 'png',
+        'bounds': ','.join(f'{v:.6f}' for v in bbox),
+        'center': f'{(bbox[0] + bbox[2]) / 2:.6f},{(bbox[1] + bbox[3]) / 2:.6f},{min_zoom}',
+        'minzoom': min_zoom,
+        'maxzoom': max_zoom,
+    })
+    if args.attribution:
+        metadata['attribution'] = args.attribution
+
+    conn = create_mbtiles(args.output, metadata)
+    written = missing = 0
+    with conn:
+        for i, (zoom, x, y) in enumerate(bbox_tiles(bbox, min_zoom, max_zoom), 1):
+            if from_url:
+                data = fetch_tile(args.source, zoom, x, y)
+                time.sleep(args.delay)
+            else:
+                row = source.execute(
+                    'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                    (zoom, x, tms_row(y, zoom)),
+                ).fetchone()
+                data = row[0] if row else None
+            if data is None:
+                missing += 1
+                continue
+            conn.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)', (zoom, x, tms_row(y, zoom), data))
+            written += 1
+            if i % 500 == 0:
+                print(f"  {i}/{total} tiles")
+    conn.close()
+
+    print(f"Extracted {written} tiles (zoom {min_zoom}-{max_zoom}) to {args.output}"
+          + (f"; {missing} not available in the source" if missing else ''))
+    return 0
+
+
+def export(args):
+    conn = open_mbtiles(args.mbtiles)
+    extension = read_metadata(conn).get('format', 'png')
+    output_dir = Path(args.output_dir)
+    count = 0
+    for zoom, column, row, data in conn.execute('SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles'):
+        path = output_dir / str(zoom) / str(column) / f'{tms_row(row, zoom)}.{extension}'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        count += 1
+    print(f"Exported {count} tiles to {output_dir} (use --basemap '{output_dir.name}/{{z}}/{{x}}/{{y}}.{extension}' "
+          f"from a map saved next to it)")
+    return 0
+
+
+def make_tile_handler(path, mime_type):
+    # One read-only connection per request thread: a sqlite3 connection must
+    # not be used from several threads at once
+    local = threading.local()
+
+    class TileHandler(BaseHTTPRequestHandler):
+        """Serves GET /{z}/{x}/{y}.<ext> from the MBTiles file."""
+
+        def do_GET(self):
+            try:
+                zoom, x, y = (int(part) for part in self.path.split('?')[0].strip('/').rsplit('.', 1)[0].split('/'))
+            except ValueError:
+                self.send_error(404)
+                return
+            if not hasattr(local, 'conn'):
+                local.conn = open_mbtiles(path)
+            row = local.conn.execute(
+                'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                (zoom, x, tms_row(y, zoom)),
+            ).fetchone()
+            if row is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', mime_type)
+            self.send_header('Content-Length', str(len(row[0])))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Cache-Control', 'public, max-age=86400')
+            self.end_headers()
+            self.wfile.write(row[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return TileHandler
+
+
+def serve(args):
+    with closing(open_mbtiles(args.mbtiles)) as conn:
+        extension = read_metadata(conn).get('format', 'png')
+    handler = make_tile_handler(args.mbtiles, TILE_MIME_TYPES.get(extension, 'application/octet-stream'))
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Serving {args.mbtiles} at http://{args.host}:{args.port}/{{z}}/{{x}}/{{y}}.{extension} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def add_arguments(parser):
+    subparsers = parser.add_subparsers(dest='tiles_command', required=True)
+
+    extract_parser = subparsers.add_parser('extract', help="copy the tiles covering a dataset's points")
+    extract_parser.add_argument('source', help='MBTiles file, or tile URL template with {z}/{x}/{y}')
+    extract_parser.add_argument('output', help='MBTiles file to write')
+    extract_parser.add_argument('--points', nargs='+', required=True, metavar='JSON',
+                                help='GeoJSON or collaborator-style datasets whose bounding box to cover')
+    extract_parser.add_argument('--zoom', nargs=2, type=int, default=[2, 12], metavar=('MIN', 'MAX'),
+                                help='zoom levels to extract (default: 2 12)')
+    extract_parser.add_argument('--padding', type=float, default=0.1,
+                                help='bounding box padding, as a fraction of its size (default: 0.1)')
+    extract_parser.add_argument('--max-tiles', type=int, default=20000,
+                                help='refuse extracts larger than this (default: 20000)')
+    extract_parser.add_argument('--delay', type=float, default=0.1,
+                                help='seconds between downloads from a URL source (default: 0.1)')
+    extract_parser.add_argument('--attribution', help="attribution to store in the output's metadata")
+    extract_parser.set_defaults(tiles_func=extract)
+
+    export_parser = subparsers.add_parser('export', help='write an MBTiles file as a z/x/y tile directory')
+    export_parser.add_argument('mbtiles')
+    export_parser.add_argument('output_dir')
+    export_parser.set_defaults(tiles_func=export)
+
+    serve_parser = subparsers.add_parser('serve', help='serve an MBTiles file over HTTP')
+    serve_parser.add_argument('mbtiles')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.set_defaults(tiles_func=serve)
+
+
+def main(args):
+    return args.tiles_func(args)
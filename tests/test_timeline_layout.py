@@ -0,0 +1,53 @@
+import random
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(REPO_ROOT), str(REPO_ROOT / 'Book_DeGruyter' / 'Timeline')]
+from timeline_layout import (
+    PRINT_FIRST_LANE,
+    PRINT_FONT_PT,
+    PRINT_LANE_GAP,
+    PRINT_MAX_DEPTH,
+    PRINT_MIN_FONT_PT,
+    build_layout,
+    print_label_width,
+)
+
+from benchmarks.synthetic import timeline_events
+from viz_common import load_json
+
+DATA_PATH = REPO_ROOT / 'Book_DeGruyter' / 'Timeline' / 'data.json'
+# x is rounded to 4 decimals in the layout
+TOLERANCE = 1e-4
+
+
+def test_book_timelines_stay_on_one_page():
+    layout = build_layout(load_json(DATA_PATH), source='data.json')
+    for timeline in layout['timelines'].values():
+        assert timeline['pages'] == [timeline['years']]
+        assert PRINT_MIN_FONT_PT <= timeline['font_size'] <= PRINT_FONT_PT
+    hand_placed = [event for event in load_json(DATA_PATH) if 'x' in event]
+    assert sum(event['print']['lane'] is None for event in layout['events']) == len(hand_placed)
+
+
+def test_print_labels_stay_on_the_page():
+    real = load_json(DATA_PATH)
+    layout = build_layout(timeline_events(real, 100, random.Random(0)), source='synthetic')
+
+    for name, timeline in layout['timelines'].items():
+        events = [event for event in layout['events'] if event['print']['timeline'] == name]
+        assert len(events) == sum(event['category'] in timeline['categories'] for event in layout['events'])
+        for pages, placement, font_pt in (('pages', lambda event: event['print'], timeline['font_size']),
+                                          ('decade_pages', lambda event: event['print']['decade'], PRINT_FONT_PT)):
+            narrowest = min(print_label_width(event['lines'], font_pt) for event in events)
+            lanes = {}
+            for event in events:
+                place = placement(event)
+                assert 0 <= place['page'] < len(timeline[pages])
+                depth = abs(place['x'] - 0.5) + print_label_width(event['lines'], font_pt)
+                assert depth <= PRINT_MAX_DEPTH + TOLERANCE, (name, pages, event['event'])
+                lanes.setdefault((place['page'], event['country']), set()).add(place['lane'])
+            for (_, country), side_lanes in lanes.items():
+                first = abs(PRINT_FIRST_LANE[country] - 0.5)
+                assert len(side_lanes) <= (PRINT_MAX_DEPTH - first + PRINT_LANE_GAP) / (narrowest + PRINT_LANE_GAP)
@@ -11,7 +11,15 @@ root to sys.path:
     from viz_common import ...
 """
 
+import base64
+import hashlib
 import json
+import os
+import pickle
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
 
 # --- Design tokens ---------------------------------------------------------
 
@@ -42,6 +50,174 @@ QUALITATIVE_PALETTE = [
 ]
 
 
+# --- Instrumentation -------------------------------------------------------
+
+# Scripts mark their stages (load, aggregate, build figure, write output)
+# with span(); listeners receive one record per finished span. Setting
+# REMOBOKO_TRACE enables the built-in recorder (see enable_tracing).
+_span_listeners = []
+_span_stack = []
+
+TRACE_ENV_VAR = 'REMOBOKO_TRACE'
+
+
+def add_span_listener(listener):
+    """
+    Call listener(record) each time a span ends. A record is a dict with name,
+    depth, start (perf_counter seconds), wall_s, cpu_s and peak_bytes
+    (tracemalloc peak during the span, or None when tracemalloc is off).
+    """
+    _span_listeners.append(listener)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a stage of a script; a no-op unless a span listener is registered.
+    Works as a context manager or as a decorator:
+
+        with span('load'):
+            ...
+
+        @span('parse table')
+        def parse(...):
+    """
+    if not _span_listeners:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Fold the enclosing span's peak so far into it before resetting
+        if _span_stack:
+            parent = _span_stack[-1]
+            parent['peak_bytes'] = max(parent['peak_bytes'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    record = {'name': name, 'depth': len(_span_stack), 'peak_bytes': 0}
+    _span_stack.append(record)
+    cpu_start = time.process_time()
+    record['start'] = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['wall_s'] = time.perf_counter() - record['start']
+        record['cpu_s'] = time.process_time() - cpu_start
+        _span_stack.pop()
+        if tracing:
+            record['peak_bytes'] = max(record['peak_bytes'], tracemalloc.get_traced_memory()[1])
+            if _span_stack:
+                parent = _span_stack[-1]
+                parent['peak_bytes'] = max(parent['peak_bytes'], record['peak_bytes'])
+        else:
+            record['peak_bytes'] = None
+        for listener in _span_listeners:
+            listener(record)
+
+
+@contextmanager
+def recorded_spans():
+    """
+    Collect the records of spans that end inside the block into the yielded
+    list, e.g. in a worker process, to send them back to the parent for
+    replay_spans().
+    """
+    records = []
+    _span_listeners.append(records.append)
+    try:
+        yield records
+    finally:
+        _span_listeners.remove(records.append)
+
+
+def replay_spans(records):
+    """
+    Pass span records from another process (see recorded_spans) to this
+    process's listeners, nested under the current span. Their start times
+    are comparable: perf_counter is system-wide on Linux and macOS.
+    """
+    for record in records:
+        nested = {**record, 'depth': record['depth'] + len(_span_stack)}
+        for listener in _span_listeners:
+            listener(nested)
+
+
+def _write_chrome_trace(records, origin, path):
+    """Write span records as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    events = [
+        {
+            'name': record['name'],
+            'ph': 'X',
+            'ts': round((record['start'] - origin) * 1e6),
+            'dur': round(record['wall_s'] * 1e6),
+            'pid': pid,
+            'tid': 0,
+            'args': {
+                'cpu_ms': round(record['cpu_s'] * 1e3, 3),
+                'peak_mb': None if record['peak_bytes'] is None else round(record['peak_bytes'] / 2**20, 3),
+            },
+        }
+        for record in records
+    ]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def format_span_summary(records):
+    """Table of span totals per name (calls, wall, CPU, peak memory), slowest first."""
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_bytes': None})
+        total['calls'] += 1
+        total['wall_s'] += record['wall_s']
+        total['cpu_s'] += record['cpu_s']
+        if record['peak_bytes'] is not None:
+            total['peak_bytes'] = max(total['peak_bytes'] or 0, record['peak_bytes'])
+
+    lines = [f"{'span':32} {'calls':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}"]
+    for name, total in sorted(totals.items(), key=lambda item: -item[1]['wall_s']):
+        peak = '-' if total['peak_bytes'] is None else f"{total['peak_bytes'] / 2**20:.1f}"
+        lines.append(f"{name[:32]:32} {total['calls']:>5} {total['wall_s']:>9.3f} {total['cpu_s']:>9.3f} {peak:>9}")
+    return '\n'.join(lines)
+
+
+def enable_tracing(path=None):
+    """
+    Record every span with wall time, CPU time and tracemalloc peak memory. At
+    exit, write them as a Chrome trace to `path` (default
+    .cache/traces/trace-<time>-<pid>.json under the repository root) and print
+    a summary table to stderr. Called on import when REMOBOKO_TRACE is set: to
+    a file path, or to 1 for the default location.
+    """
+    import atexit
+    import sys
+
+    if path is None:
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = Path(__file__).resolve().parent / '.cache' / 'traces' / f'trace-{stamp}-{os.getpid()}.json'
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    records = []
+    origin = time.perf_counter()
+    add_span_listener(records.append)
+
+    def report():
+        if not records:
+            return
+        _write_chrome_trace(records, origin, path)
+        print(format_span_summary(records), file=sys.stderr)
+        print(f"Trace written to {path}", file=sys.stderr)
+
+    atexit.register(report)
+
+
+if os.environ.get(TRACE_ENV_VAR):
+    enable_tracing(None if os.environ[TRACE_ENV_VAR] == '1' else os.environ[TRACE_ENV_VAR])
+
+
 # --- Data loading ----------------------------------------------------------
 
 def load_json(path):
@@ -50,29 +226,490 @@ def load_json(path):
         return json.load(f)
 
 
+# Bump when load_table's parsing changes, to invalidate existing sidecars
+TABLE_CACHE_VERSION = 1
+
+# Parsed tables, per process, keyed by JSON path
+_table_memo = {}
+
+# What pickle.load raises on a sidecar that is missing, truncated or written
+# by incompatible library versions; the sidecar is then rebuilt
+_SIDECAR_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError,
+                   ValueError)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@span('parse table')
+def _parse_table(path, records, dates, categories, coordinates):
+    import pandas as pd
+
+    data = load_json(path)
+    frame = pd.DataFrame(data[records] if records else data)
+    for column in dates:
+        frame[column] = pd.to_datetime(frame[column], format='%Y-%m-%d')
+    for column in categories:
+        # Empty strings count as missing, like the `if row[column]` checks they replace
+        frame[column] = frame[column].replace('', None).astype('category')
+    if coordinates:
+        parts = frame[coordinates].str.split(',', n=1, expand=True).reindex(columns=[0, 1])
+        for column, values in (('Latitude', parts[0]), ('Longitude', parts[1])):
+            # to_numeric flags unparseable values; astype does the exact
+            # (round-trip) conversion of the rest
+            parseable = pd.to_numeric(values, errors='coerce').notna()
+            frame[column] = values.where(parseable).astype('float64')
+    return frame
+
+
+def load_table(path, records=None, dates=(), categories=(), coordinates=None):
+    """
+    Load a JSON dataset as a pandas DataFrame with typed columns: `dates` as
+    datetime64, `categories` as categoricals, and a 'lat,lng' `coordinates`
+    column split into float Latitude/Longitude (NaN when unparseable).
+    `records` names the key holding the row list, if the JSON is an object.
+
+    The parsed frame is cached in a pickle sidecar next to the JSON file
+    (.<name>.cache.pkl), reused while the file's mtime and size match, or its
+    SHA-256 when only the mtime changed (e.g. after a fresh checkout). Within
+    one process the frame is parsed at most once; callers get a shallow copy.
+    """
+    import pandas as pd
+
+    path = Path(path).resolve()
+    spec = (TABLE_CACHE_VERSION, pd.__version__, records, tuple(dates), tuple(categories), coordinates)
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    memo = _table_memo.get(path)
+    if memo is None or memo['spec'] != spec or memo['stamp'] != stamp:
+        sidecar = path.with_name(f'.{path.name}.cache.pkl')
+        try:
+            with open(sidecar, 'rb') as f:
+                cached = pickle.load(f)
+        except _SIDECAR_ERRORS:
+            cached = None
+
+        if cached is not None and cached['spec'] == spec and cached['stamp'] == stamp:
+            memo = cached
+        else:
+            sha256 = _file_sha256(path)
+            if cached is not None and cached['spec'] == spec and cached['sha256'] == sha256:
+                frame = cached['frame']
+            else:
+                frame = _parse_table(path, records, dates, categories, coordinates)
+            memo = {'spec': spec, 'stamp': stamp, 'sha256': sha256, 'frame': frame}
+            # Per-process temp name: parallel builds may load the same table at once
+            tmp_path = sidecar.with_name(f'{sidecar.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(memo, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, sidecar)
+        _table_memo[path] = memo
+
+    return memo['frame'].copy(deep=False)
+
+
+def load_publications(path):
+    """Publications_and_activities_data.json as a typed DataFrame (see load_table)."""
+    return load_table(path, records='rows', dates=['Date'], categories=['Type', 'Language'])
+
+
+def load_collaborators(path):
+    """Collaborators_data.json as a typed DataFrame with Latitude/Longitude (see load_table)."""
+    return load_table(path, categories=['Country', 'Gender'], coordinates='Coordinate location')
+
+
+# --- Aggregation -----------------------------------------------------------
+
+# Time bucket sizes for bucket_counts(), in months
+GRANULARITY_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def period_labels(first, count, granularity):
+    """Labels of `count` consecutive periods from ordinal `first` (periods since 1970)."""
+    if granularity == 'month':
+        return [f'{1970 + p // 12}-{p % 12 + 1:02d}' for p in range(first, first + count)]
+    if granularity == 'quarter':
+        return [f'{1970 + p // 4}-Q{p % 4 + 1}' for p in range(first, first + count)]
+    return [str(1970 + p) for p in range(first, first + count)]
+
+
+def bucket_counts(dates, categories, granularity='quarter', weights=None):
+    """
+    Count rows per (category, time period) in one vectorized pass.
+
+    Returns (matrix, category_labels, period_labels): a dense
+    len(categories) x len(periods) NumPy matrix of counts (or summed
+    weights), the sorted categories that occur, and the period labels
+    ('YYYY-MM', 'YYYY-Qn' or 'YYYY' for granularity 'month', 'quarter' or
+    'year'). Periods run without gaps from the first period of the earliest
+    year to the latest period present; empty periods are 0. Rows with a
+    missing date or category are ignored.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if granularity not in GRANULARITY_MONTHS:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITY_MONTHS)}, not {granularity!r}")
+
+    dates = pd.Series(dates).reset_index(drop=True)
+    categories = pd.Series(categories).reset_index(drop=True)
+    keep = (dates.notna() & categories.notna()).to_numpy()
+    months = dates[keep].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    codes, labels = pd.factorize(categories[keep], sort=True)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[keep]
+
+    if not len(months):
+        return np.zeros((0, 0), dtype=int if weights is None else float), [], []
+
+    # Period ordinals since 1970; the range starts at the earliest year's first period
+    periods = months // GRANULARITY_MONTHS[granularity]
+    first = months.min() // 12 * 12 // GRANULARITY_MONTHS[granularity]
+    n_periods = int(periods.max() - first + 1)
+
+    flat = codes * n_periods + (periods - first)
+    matrix = np.bincount(flat, weights=weights, minlength=len(labels) * n_periods).reshape(len(labels), n_periods)
+    return matrix, [str(label) for label in labels], period_labels(int(first), n_periods, granularity)
+
+
+# Bump when AggregateCube's layout or row parsing changes, to invalidate sidecars
+CUBE_VERSION = 1
+
+# Dimensions AggregateCube.rollup() accepts; Year and Quarter derive from Month
+CUBE_DIMENSIONS = ('Type', 'Language', 'Year', 'Quarter', 'Month', 'Author')
+
+# Between the path values of a treemap node id
+TREEMAP_ID_SEPARATOR = '\x1f'
+
+
+def _month_ordinal(date):
+    """Months since 1970-01 of a 'YYYY-MM-DD' date string, or None if empty."""
+    if not date:
+        return None
+    year, month = int(date[0:4]), int(date[5:7])
+    if not 1 <= month <= 12 or date[4] != '-':
+        raise ValueError(f"Date {date!r} does not match format '%Y-%m-%d'")
+    return (year - 1970) * 12 + month - 1
+
+
+class AggregateCube:
+    """
+    Publication counts by Type, Language and Month, plus the same counts
+    per Author (a row with several authors counts once for each of them,
+    and once overall). Built from the publications rows and kept up to
+    date incrementally: each row is identified by a hash of the fields
+    the cube reads, and only rows whose hash appeared or disappeared since
+    the last update are added or subtracted.
+
+    rollup() answers queries at any coarser grain; treemap() returns the
+    ids/labels/parents/values arrays of a go.Treemap. Load it with
+    load_publication_cube(), which keeps it in a sidecar next to the data.
+    """
+
+    def __init__(self):
+        # Row hash -> [multiplicity, (Type, Language, Month), (authors...)]
+        self.rows = {}
+        # (Type, Language, Month) -> count, and (Type, Language, Month, Author) -> count
+        self.counts = {}
+        self.author_counts = {}
+
+    @staticmethod
+    def row_key(row):
+        fields = (row.get('Type'), row.get('Language'), row.get('Date'), row.get('Author(s)'))
+        return hashlib.blake2b(json.dumps(fields).encode('utf-8'), digest_size=16).hexdigest()
+
+    def _apply(self, cell, authors, delta):
+        for table, key in [(self.counts, cell), *((self.author_counts, (*cell, a)) for a in authors)]:
+            count = table.get(key, 0) + delta
+            if count:
+                table[key] = count
+            else:
+                del table[key]
+
+    def update(self, rows):
+        """Bring the cube in line with `rows`; returns (rows added, rows removed)."""
+        current = {}
+        for row in rows:
+            key = self.row_key(row)
+            entry = current.get(key)
+            if entry is None:
+                current[key] = entry = [0, row]
+            entry[0] += 1
+
+        added = removed = 0
+        for key, (multiplicity, cell, authors) in list(self.rows.items()):
+            delta = current.get(key, [0])[0] - multiplicity
+            if delta < 0:
+                self._apply(cell, authors, delta)
+                removed -= delta
+                if key not in current:
+                    del self.rows[key]
+                else:
+                    self.rows[key][0] += delta
+        for key, (multiplicity, row) in current.items():
+            known = self.rows.get(key)
+            delta = multiplicity - (known[0] if known else 0)
+            if delta > 0:
+                if known is None:
+                    cell = (row.get('Type') or None, row.get('Language') or None, _month_ordinal(row.get('Date')))
+                    authors = tuple(a.strip() for a in (row.get('Author(s)') or '').split('|') if a.strip())
+                    known = self.rows[key] = [0, cell, authors]
+                self._apply(known[1], known[2], delta)
+                known[0] += delta
+                added += delta
+        return added, removed
+
+    @property
+    def total_rows(self):
+        return sum(self.counts.values())
+
+    def rollup(self, *dimensions):
+        """
+        Counts grouped by `dimensions` (any of CUBE_DIMENSIONS), as a Series
+        with a (Multi)Index sorted by dimension values. Rows missing one of
+        the requested dimensions are left out. Year, Quarter and Month
+        values are 'YYYY', 'YYYY-Qn' and 'YYYY-MM' strings.
+        """
+        import pandas as pd
+
+        unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+        if unknown or not dimensions:
+            raise ValueError(f"Roll-up dimensions must be among {', '.join(CUBE_DIMENSIONS)}, got {dimensions}")
+
+        by_author = 'Author' in dimensions
+        table = self.author_counts if by_author else self.counts
+        columns = ['Type', 'Language', 'Month', 'Author'][:4 if by_author else 3]
+        cells = pd.DataFrame(list(table), columns=columns)
+        cells['Count'] = list(table.values())
+        cells = cells.dropna(subset=[d if d in columns else 'Month' for d in dimensions])
+
+        month = cells['Month'].astype('Int64')
+        year = month // 12 + 1970
+        if 'Year' in dimensions:
+            cells['Year'] = year.astype(str)
+        if 'Quarter' in dimensions:
+            cells['Quarter'] = year.astype(str) + '-Q' + (month % 12 // 3 + 1).astype(str)
+        if 'Month' in dimensions:
+            cells['Month'] = year.astype(str) + '-' + (month % 12 + 1).astype(str).str.zfill(2)
+        return cells.groupby(list(dimensions))['Count'].sum()
+
+    def treemap(self, path):
+        """
+        (ids, labels, parents, values) for a go.Treemap over the `path`
+        dimensions, outermost first, with branchvalues='total'. Rows missing
+        any path dimension are left out at every level, so each node's value
+        is the sum of its children. Ids join the path's values with the ASCII
+        unit separator, since values such as 'Lecture/presentation' may
+        contain any printable character.
+        """
+        leaves = self.rollup(*path)
+        ids, labels, parents, values = [], [], [], []
+        for depth in range(1, len(path) + 1):
+            level = leaves.groupby(level=list(range(depth))).sum() if depth < len(path) else leaves
+            for index, value in level.items():
+                key = index if isinstance(index, tuple) else (index,)
+                ids.append(TREEMAP_ID_SEPARATOR.join(map(str, key)))
+                labels.append(str(key[-1]))
+                parents.append(TREEMAP_ID_SEPARATOR.join(map(str, key[:-1])))
+                values.append(int(value))
+        return ids, labels, parents, values
+
+
+# Cubes, per process, keyed by JSON path
+_cube_memo = {}
+
+
+@span('update cube')
+def _update_cube(cube, path):
+    added, removed = cube.update(load_json(path)['rows'])
+    return added, removed
+
+
+def load_publication_cube(path):
+    """
+    The AggregateCube of a publications JSON file. It is kept in a pickle
+    sidecar (.<name>.cube.cache.pkl) and reused as is while the file's
+    mtime and size match; otherwise it is updated incrementally from the
+    rows that changed, and saved again.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    memo = _cube_memo.get(path)
+    if memo is None or memo['stamp'] != stamp:
+        sidecar = path.with_name(f'.{path.name}.cube.cache.pkl')
+        try:
+            with open(sidecar, 'rb') as f:
+                memo = pickle.load(f)
+            if memo['version'] != CUBE_VERSION:
+                memo = None
+        except (*_SIDECAR_ERRORS, KeyError):  # KeyError: from an older layout
+            memo = None
+
+        if memo is None or memo['stamp'] != stamp:
+            cube = memo['cube'] if memo is not None else AggregateCube()
+            _update_cube(cube, path)
+            memo = {'version': CUBE_VERSION, 'stamp': stamp, 'cube': cube}
+            tmp_path = sidecar.with_name(f'{sidecar.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(memo, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, sidecar)
+        _cube_memo[path] = memo
+
+    return memo['cube']
+
+
+# --- Images ----------------------------------------------------------------
+
+# Bump when thumbnail() encoding changes, to invalidate cached thumbnails
+THUMBNAIL_CACHE_VERSION = 1
+THUMBNAIL_CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'thumbnails'
+
+
+@span('encode thumbnail')
+def _encode_thumbnail(path, size, image_format, quality):
+    import io
+
+    from PIL import Image
+
+    with Image.open(path) as source:
+        source.thumbnail((size, size), Image.LANCZOS)
+        image = source
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail(path, size, quality=85):
+    """
+    The image at path scaled down to fit size x size px, as (bytes, MIME
+    type): WebP when this Pillow build can write it, PNG otherwise.
+    Thumbnails are cached under .cache/thumbnails, keyed by the source
+    file's SHA-256, so they are only re-encoded when the image changes.
+    """
+    from PIL import features
+
+    image_format, mime_type = ('WEBP', 'image/webp') if features.check('webp') else ('PNG', 'image/png')
+    key = f'{_file_sha256(path)}-{size}-{quality}-v{THUMBNAIL_CACHE_VERSION}.{image_format.lower()}'
+    cache_path = THUMBNAIL_CACHE_DIR / key
+    try:
+        return cache_path.read_bytes(), mime_type
+    except FileNotFoundError:
+        pass
+
+    data = _encode_thumbnail(path, size, image_format, quality)
+    THUMBNAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f'{key}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, cache_path)
+    return data, mime_type
+
+
+def thumbnail_data_uri(path, size, quality=85):
+    """thumbnail() as a base64 data: URI, for embedding in HTML or CSS."""
+    data, mime_type = thumbnail(path, size, quality)
+    return f'data:{mime_type};base64,{base64.b64encode(data).decode("ascii")}'
+
+
 # --- Folium ----------------------------------------------------------------
 
-def create_base_map(location, zoom_start):
+# Environment variable naming a default local basemap for every map
+BASEMAP_ENV_VAR = 'REMOBOKO_BASEMAP'
+
+
+def create_base_map(location, zoom_start, prefer_canvas=False, basemap=None,
+                    basemap_attribution='&copy; OpenStreetMap contributors'):
     """
     Create the project's standard folium base map: CartoDB Voyager default
     plus Light/Dark tile options, fullscreen, minimap and mouse position.
     Call folium.LayerControl(collapsed=False).add_to(m) after adding layers.
+
+    prefer_canvas draws vector layers (circle markers, paths) on one <canvas>
+    instead of one SVG element each, which keeps maps with thousands of
+    them responsive. Icon markers are DOM elements either way; cluster them
+    (see marker_layer) instead.
+
+    basemap replaces the CartoDB layers with one local tile source: an XYZ
+    URL template, either a tile directory relative to the saved HTML
+    ('tiles/{z}/{x}/{y}.png') or a local tile server
+    ('http://localhost:8765/{z}/{x}/{y}.png'); see `python -m remoboko tiles`.
+    Defaults to $REMOBOKO_BASEMAP when set.
     """
     import folium
     from folium.plugins import Fullscreen, MiniMap, MousePosition
 
-    m = folium.Map(location=location, zoom_start=zoom_start, tiles=None)
+    basemap = basemap or os.environ.get(BASEMAP_ENV_VAR)
+    m = folium.Map(location=location, zoom_start=zoom_start, tiles=None, prefer_canvas=prefer_canvas)
 
-    folium.TileLayer('CartoDB Voyager', name='Detailed', show=True).add_to(m)
-    folium.TileLayer('CartoDB Positron', name='Light').add_to(m)
-    folium.TileLayer('CartoDB DarkMatter', name='Dark').add_to(m)
+    if basemap:
+        folium.TileLayer(basemap, name='Local tiles', attr=basemap_attribution, show=True).add_to(m)
+        minimap_tiles = folium.TileLayer(basemap, attr=basemap_attribution)
+    else:
+        folium.TileLayer('CartoDB Voyager', name='Detailed', show=True).add_to(m)
+        folium.TileLayer('CartoDB Positron', name='Light').add_to(m)
+        folium.TileLayer('CartoDB DarkMatter', name='Dark').add_to(m)
+        minimap_tiles = None
 
     Fullscreen(position='topleft').add_to(m)
-    MiniMap(position='bottomright', width=120, height=120, toggle_display=True).add_to(m)
+    MiniMap(tile_layer=minimap_tiles, position='bottomright', width=120, height=120, toggle_display=True).add_to(m)
     MousePosition(position='bottomleft', prefix='Coordinates:').add_to(m)
     return m
 
 
+def marker_layer(name, cluster=False, icon_create_function=None, **kwargs):
+    """
+    Parent layer for a map's markers: a FeatureGroup, or with cluster=True a
+    MarkerCluster that groups nearby markers client-side (loaded in chunks
+    so the page stays responsive while it fills). Either works as the parent
+    of FeatureGroupSubGroup toggles and as the layer for add_search().
+    """
+    import folium
+    from folium.plugins import MarkerCluster
+
+    if not cluster:
+        return folium.FeatureGroup(name=name, **kwargs)
+    return MarkerCluster(
+        name=name,
+        icon_create_function=icon_create_function,
+        options={'chunkedLoading': True, 'showCoverageOnHover': False, 'spiderfyOnMaxZoom': True},
+        **kwargs,
+    )
+
+
+def add_search(m, layer, **kwargs):
+    """
+    Add the Search plugin over layer's markers (see folium.plugins.Search for
+    kwargs). If layer is a MarkerCluster, a found marker is first pulled out
+    of its cluster (zoomToShowLayer), so its popup can open.
+    """
+    from branca.element import MacroElement
+    from folium.plugins import MarkerCluster, Search
+    from jinja2 import Template
+
+    Search(layer=layer, **kwargs).add_to(m)
+    if isinstance(layer, MarkerCluster):
+        reveal = MacroElement()
+        reveal._template = Template("""
+            {% macro script(this, kwargs) %}
+            {{ this.layer }}searchControl.on('search:locationfound', function (e) {
+                {{ this.layer }}.zoomToShowLayer(e.layer, function () { e.layer.openPopup(); });
+            });
+            {% endmacro %}
+        """)
+        reveal.layer = layer.get_name()
+        reveal.add_to(m)
+    return m
+
+
 # --- Plotly ----------------------------------------------------------------
 
 def register_plotly_template():
@@ -126,3 +763,62 @@ def plotly_config(filename, width=1000, height=600):
             'scale': 2,
         },
     }
+
+
+# Local plotly.js bundle shared by every chart page in a folder, instead of
+# inlining ~4.5 MB of JavaScript into each HTML file. The version in the name
+# lets browsers cache it indefinitely and invalidates it on plotly upgrades.
+PLOTLY_JS_ASSET = 'plotly-{version}.min.js'
+
+
+def write_plotly_js(directory):
+    """
+    Write the plotly.js bundle matching the installed plotly into directory,
+    unless it is already there, and remove bundles of other versions.
+    Returns the asset's file name.
+    """
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    directory = Path(directory)
+    name = PLOTLY_JS_ASSET.format(version=get_plotlyjs_version())
+    for stale in directory.glob(PLOTLY_JS_ASSET.format(version='*')):
+        if stale.name != name:
+            stale.unlink()
+    path = directory / name
+    if not path.exists():
+        # Per-process temp name: parallel builds may write the asset at once
+        tmp_path = path.with_name(f'{name}.{os.getpid()}.tmp')
+        tmp_path.write_text(get_plotlyjs(), encoding='utf-8')
+        os.replace(tmp_path, path)
+    return name
+
+
+def write_plotly_html(fig, path, config=None, plotlyjs='shared'):
+    """
+    fig.write_html() with the library either shared or inlined:
+
+    - 'shared': the page loads the versioned plotly.js asset from its own
+      folder (see write_plotly_js), so it works offline and from file://.
+    - 'inline': the whole bundle is embedded, for a single self-contained file.
+    """
+    if plotlyjs == 'shared':
+        include_plotlyjs = write_plotly_js(Path(path).parent)
+    elif plotlyjs == 'inline':
+        include_plotlyjs = True
+    else:
+        raise ValueError(f"plotlyjs must be 'shared' or 'inline', not {plotlyjs!r}")
+    fig.write_html(path, config=config, include_plotlyjs=include_plotlyjs)
+
+
+def write_plotly_spec(fig, path, config=None):
+    """
+    Write fig and its config as one JSON file, {"figure": ..., "config": ...},
+    for pages that draw the chart themselves (the report dashboard) instead
+    of re-running the script that built it. Unlike the HTML page, the spec is
+    deterministic, so it only changes when the figure does.
+    """
+    import plotly.io as pio
+
+    spec = {'figure': json.loads(pio.to_json(fig, validate=False)), 'config': config or {}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)